@@ -0,0 +1,42 @@
+"""
+Replays the benchmarks run on, run them with pytest benchmarks. Each benchmark is
+grouped with a reference copy of the code it replaced, so the speedup shows in one table.
+"""
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+import packaging.version
+
+from replay_unpack.crypto import decrypt
+from replay_unpack.parser import ReplayParser
+
+REPLAYS = Path(__file__).parent.parent / "tests" / "replays"
+# a long battle, with many entities and packets of every kind
+JAGER = REPLAYS / "12_6_0" / "jager.wowsreplay"
+
+
+class Replay(NamedTuple):
+    version: packaging.version.Version
+    # decompressed packet stream
+    raw: bytes
+
+
+@lru_cache(maxsize=None)
+def read_payload(path: Path) -> bytes:
+    """
+    Encrypted payload of a replay, everything after its header.
+    """
+    with ReplayParser(path) as parser:
+        payload_size = parser.scan_header().payload_size
+    data = path.read_bytes()
+    return data[len(data) - payload_size :]
+
+
+@lru_cache(maxsize=None)
+def read_replay(path: Path) -> Replay:
+    with ReplayParser(path) as parser:
+        arena_info = parser.scan_header().arena_info
+    version = packaging.version.parse(arena_info["clientVersionFromXml"].replace(",", "."))
+    return Replay(version, zlib.decompress(decrypt(read_payload(path))))
@@ -0,0 +1,66 @@
+"""
+Decryption of the payloads of all test replays.
+"""
+import io
+import struct
+from typing import List, Optional
+
+import pytest
+from Cryptodome.Cipher import Blowfish
+
+from replay_unpack import crypto
+
+from samples import REPLAYS, read_payload
+
+
+def decrypt_per_block(encrypted: bytes) -> bytes:
+    """
+    The loop payloads were decrypted with before, one block at a time.
+    """
+    blowfish = Blowfish.new(crypto.BLOWFISH_KEY, Blowfish.MODE_ECB)
+    buffer = io.BytesIO()
+    previous_block: Optional[int] = None
+
+    for index in range(0, len(encrypted), 8):
+        chunk = encrypted[index : index + 8]
+
+        (decrypted_block,) = struct.unpack("q", blowfish.decrypt(chunk))
+        if previous_block:
+            decrypted_block ^= previous_block
+        previous_block = decrypted_block
+
+        buffer.write(struct.pack("q", decrypted_block))
+
+    return buffer.getvalue()
+
+
+def decrypt_all(decrypt, payloads):
+    return [decrypt(payload) for payload in payloads]
+
+
+@pytest.fixture(scope="module")
+def payloads() -> List[bytes]:
+    return [read_payload(path) for path in sorted(REPLAYS.glob("*/*.wowsreplay"))]
+
+
+@pytest.fixture(scope="module")
+def expected(payloads):
+    return decrypt_all(decrypt_per_block, payloads)
+
+
+@pytest.mark.benchmark(group="decrypt")
+def test_per_block(benchmark, payloads, expected):
+    assert benchmark.pedantic(decrypt_all, (decrypt_per_block, payloads), rounds=1) == expected
+
+
+@pytest.mark.benchmark(group="decrypt")
+def test_bulk_numpy(benchmark, payloads, expected):
+    if crypto.np is None:
+        pytest.skip("numpy is not installed")
+    assert benchmark(decrypt_all, crypto.decrypt, payloads) == expected
+
+
+@pytest.mark.benchmark(group="decrypt")
+def test_bulk_stdlib(benchmark, monkeypatch, payloads, expected):
+    monkeypatch.setattr(crypto, "np", None)
+    assert benchmark(decrypt_all, crypto.decrypt, payloads) == expected
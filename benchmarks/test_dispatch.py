@@ -0,0 +1,114 @@
+"""
+Overhead of handing a deserialized packet to its handler, all handlers do nothing.
+"""
+from typing import Any, List, Tuple
+
+import pytest
+
+from replay_unpack.clients.wows.network.packets import (
+    PACKETS_MAPPING,
+    BasePlayerCreate,
+    BattleResults,
+    CellPlayerCreate,
+    EntityCreate,
+    EntityEnter,
+    EntityLeave,
+    EntityMethod,
+    EntityProperty,
+    Map,
+    NestedProperty,
+    PlayerEntity,
+    PlayerPosition,
+    Position,
+    Version,
+)
+from replay_unpack.clients.wows.player import ReplayPlayer
+from replay_unpack.core.network.net_packet import iter_packets
+
+from samples import JAGER, Replay, read_replay
+
+
+def noop(packet):
+    pass
+
+
+class NoopPlayer(ReplayPlayer):
+    def _ignore(self, packet):
+        pass
+
+
+for _name in ReplayPlayer.HANDLERS.values():
+    setattr(NoopPlayer, _name, NoopPlayer._ignore)
+
+
+def process_chain(packet):
+    """
+    The isinstance chain packets were dispatched with before.
+    """
+    if isinstance(packet, BasePlayerCreate):
+        noop(packet)
+    elif isinstance(packet, CellPlayerCreate):
+        noop(packet)
+    elif isinstance(packet, EntityEnter):
+        noop(packet)
+    elif isinstance(packet, EntityLeave):
+        noop(packet)
+    elif isinstance(packet, EntityCreate):
+        noop(packet)
+    elif isinstance(packet, EntityProperty):
+        noop(packet)
+    elif isinstance(packet, EntityMethod):
+        noop(packet)
+    elif isinstance(packet, Position):
+        noop(packet)
+    elif isinstance(packet, Version):
+        noop(packet)
+    elif isinstance(packet, PlayerEntity):
+        noop(packet)
+    elif isinstance(packet, BattleResults):
+        noop(packet)
+    elif isinstance(packet, NestedProperty):
+        noop(packet)
+    elif isinstance(packet, Map):
+        noop(packet)
+    elif isinstance(packet, PlayerPosition):
+        noop(packet)
+
+
+@pytest.fixture(scope="module")
+def jager() -> Replay:
+    return read_replay(JAGER)
+
+
+@pytest.fixture(scope="module")
+def packets(jager) -> List[Tuple[int, Any]]:
+    return [
+        (packet.type, PACKETS_MAPPING[packet.type](packet.raw_data))
+        for packet in iter_packets([jager.raw])
+        if PACKETS_MAPPING.get(packet.type) in ReplayPlayer.HANDLERS
+    ]
+
+
+def dispatch_chain(packets):
+    for _, packet in packets:
+        process_chain(packet)
+
+
+def dispatch_table(handlers, packets):
+    for type_, packet in packets:
+        handler = handlers.get(type_)
+        if handler is not None:
+            handler(packet)
+
+
+@pytest.mark.benchmark(group="dispatch")
+def test_isinstance_chain(benchmark, packets):
+    benchmark.extra_info["packets"] = len(packets)
+    benchmark(dispatch_chain, packets)
+
+
+@pytest.mark.benchmark(group="dispatch")
+def test_handler_table(benchmark, jager, packets):
+    handlers = NoopPlayer(jager.version, 0.5)._get_handlers()
+    benchmark.extra_info["packets"] = len(packets)
+    benchmark(dispatch_table, handlers, packets)
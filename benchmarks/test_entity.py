@@ -0,0 +1,72 @@
+"""
+Creating the entities of all EntityCreate packets of a replay.
+"""
+from typing import List
+
+import pytest
+
+from replay_unpack.clients.wows.helper import get_definitions
+from replay_unpack.clients.wows.network.packets import EntityCreate
+from replay_unpack.core import Entity
+from replay_unpack.core.entity import Subscriptions
+from replay_unpack.core.entity_def import EntityDef
+from replay_unpack.core.entity_def.entity_description import (
+    BASE_PROPERTIES_FLAGS,
+    CELL_PROPERTIES_FLAGS,
+    CLIENT_PROPERTIES_FLAGS,
+    CLIENT_PROPERTIES_INTERNAL_FLAGS,
+)
+from replay_unpack.core.network.net_packet import iter_packets
+
+from samples import JAGER, Replay, read_replay
+
+
+@pytest.fixture(scope="module")
+def jager() -> Replay:
+    return read_replay(JAGER)
+
+
+@pytest.fixture(scope="module")
+def specs(jager) -> List[EntityDef]:
+    definitions = get_definitions("12_6_0")
+    return [
+        definitions.get_entity_def_by_index(EntityCreate(packet.raw_data).type)
+        for packet in iter_packets([jager.raw])
+        if packet.type == 0x5
+    ]
+
+
+def create(specs, subscriptions):
+    for spec in specs:
+        Entity(1, spec, subscriptions)
+
+
+def create_with_tables(specs, subscriptions):
+    """
+    Entities as they were created before, filtering and sorting the index tables
+    of their type every time.
+    """
+    for spec in specs:
+        entity = Entity(1, spec, subscriptions)
+        spec.client().get_exposed_index_map()
+        properties = spec.properties()
+        entity.client_properties = properties.get_properties_by_flags(
+            CLIENT_PROPERTIES_FLAGS, exposed_index=True
+        )
+        entity.client_properties_internal = properties.get_properties_by_flags(
+            CLIENT_PROPERTIES_INTERNAL_FLAGS
+        )
+        entity.cell_properties = properties.get_properties_by_flags(CELL_PROPERTIES_FLAGS)
+        entity.base_properties = properties.get_properties_by_flags(BASE_PROPERTIES_FLAGS)
+
+
+@pytest.mark.benchmark(group="entity")
+def test_tables_per_entity(benchmark, specs):
+    benchmark.extra_info["entities"] = len(specs)
+    benchmark(create_with_tables, specs, Subscriptions())
+
+
+@pytest.mark.benchmark(group="entity")
+def test_shared_tables(benchmark, specs):
+    benchmark.extra_info["entities"] = len(specs)
+    benchmark(create, specs, Subscriptions())
@@ -0,0 +1,137 @@
+"""
+Calling entity methods for all EntityMethod packets of a replay, with nothing
+subscribed and with every method subscribed, and playing whole replays.
+"""
+import logging
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from replay_unpack.clients.wows.helper import get_definitions
+from replay_unpack.clients.wows.network.packets import PACKETS_MAPPING, EntityMethod
+from replay_unpack.clients.wows.player import ReplayPlayer
+from replay_unpack.core import Entity
+from replay_unpack.core.entity import Subscriptions
+from replay_unpack.core.entity_def import EntityDef
+from replay_unpack.core.network.net_packet import iter_packets
+
+from samples import JAGER, REPLAYS, Replay, read_replay
+
+Call = Tuple[Entity, EntityDef, int, bytes]
+
+
+def noop(entity, *args, **kwargs):
+    pass
+
+
+@pytest.fixture(scope="module")
+def jager() -> Replay:
+    return read_replay(JAGER)
+
+
+@pytest.fixture(scope="module")
+def specs(jager) -> Dict[int, EntityDef]:
+    definitions = get_definitions("12_6_0")
+    specs = {}
+    for packet in iter_packets([jager.raw]):
+        if packet.type in (0x0, 0x1):
+            created = PACKETS_MAPPING[packet.type](packet.raw_data)
+            specs[created.entityId] = definitions.get_entity_def_by_name("Avatar")
+        elif packet.type == 0x5:
+            created = PACKETS_MAPPING[packet.type](packet.raw_data)
+            specs[created.entityID] = definitions.get_entity_def_by_index(created.type)
+    return specs
+
+
+@pytest.fixture(scope="module")
+def methods(jager, specs) -> List[Tuple[int, int, bytes]]:
+    methods = []
+    for packet in iter_packets([jager.raw]):
+        if packet.type == 0x8:
+            method = EntityMethod(packet.raw_data)
+            if method.entityId in specs:
+                methods.append((method.entityId, method.messageId, method.data.value))
+    return methods
+
+
+def bind(specs, methods, subscriptions: Subscriptions) -> List[Call]:
+    entities = {
+        entity_id: Entity(entity_id, spec, subscriptions) for entity_id, spec in specs.items()
+    }
+    return [
+        (entities[entity_id], specs[entity_id], index, data) for entity_id, index, data in methods
+    ]
+
+
+def subscribe_all(specs, subscriptions: Subscriptions) -> Dict[str, List[Any]]:
+    """
+    Subscribe to every method, returns the subscriptions as they were kept before.
+    """
+    by_name = {}
+    for spec in set(specs.values()):
+        for method in spec.exposed_client_methods():
+            subscriptions.subscribe_method_call(spec.get_name(), method.get_name(), noop)
+            by_name[f"{spec.get_name()}_{method.get_name()}"] = [noop]
+    return by_name
+
+
+def call_by_name(calls: List[Call], subscriptions: Dict[str, List[Any]]):
+    """
+    Method calls as they were dispatched before, by a key built from the names.
+    """
+    for entity, spec, index, data in calls:
+        method = spec.exposed_client_methods()[index]
+        logging.debug("calling %s method %s", spec.get_name(), method)
+        method_hash = spec.get_name() + "_" + method.get_name()
+        funcs = subscriptions.get(method_hash, [])
+        if not funcs:
+            continue
+
+        args, kwargs = method.create_from_stream(BytesIO(data))
+        for func in funcs:
+            func(entity, *args, **kwargs)
+
+
+def call_by_index(calls: List[Call]):
+    for entity, _, index, data in calls:
+        entity.call_client_method(index, BytesIO(data))
+
+
+@pytest.mark.benchmark(group="method unsubscribed")
+def test_unsubscribed_by_name(benchmark, specs, methods):
+    benchmark.extra_info["calls"] = len(methods)
+    benchmark(call_by_name, bind(specs, methods, Subscriptions()), {})
+
+
+@pytest.mark.benchmark(group="method unsubscribed")
+def test_unsubscribed_by_index(benchmark, specs, methods):
+    benchmark.extra_info["calls"] = len(methods)
+    benchmark(call_by_index, bind(specs, methods, Subscriptions()))
+
+
+@pytest.mark.benchmark(group="method subscribed")
+def test_subscribed_by_name(benchmark, specs, methods):
+    benchmark.extra_info["calls"] = len(methods)
+    subscriptions = Subscriptions()
+    by_name = subscribe_all(specs, subscriptions)
+    benchmark(call_by_name, bind(specs, methods, subscriptions), by_name)
+
+
+@pytest.mark.benchmark(group="method subscribed")
+def test_subscribed_by_index(benchmark, specs, methods):
+    benchmark.extra_info["calls"] = len(methods)
+    subscriptions = Subscriptions()
+    subscribe_all(specs, subscriptions)
+    benchmark(call_by_index, bind(specs, methods, subscriptions))
+
+
+@pytest.mark.benchmark(group="play")
+@pytest.mark.parametrize("name", ["12_6_0/jager", "12_7_0/test"])
+def test_play(benchmark, name):
+    replay = read_replay(REPLAYS / f"{name}.wowsreplay")
+
+    def setup():
+        return (ReplayPlayer(replay.version, 0.5),), {}
+
+    benchmark.pedantic(lambda player: player.play(replay.raw), setup=setup, rounds=3)
@@ -0,0 +1,29 @@
+"""
+Per replay setup: constructing the player of a game version, which needs the entity
+definitions and the constants of that version.
+"""
+import pytest
+
+from replay_unpack.clients.wows import helper
+from replay_unpack.clients.wows.player import ReplayPlayer
+
+from samples import JAGER, Replay, read_replay
+
+
+@pytest.fixture(scope="module")
+def jager() -> Replay:
+    return read_replay(JAGER)
+
+
+@pytest.mark.benchmark(group="setup")
+def test_uncached(benchmark, jager):
+    # what every replay paid before definitions were shared by players
+    benchmark.pedantic(
+        ReplayPlayer, (jager.version, 0.5), setup=helper.clear_cache, rounds=10, warmup_rounds=1
+    )
+
+
+@pytest.mark.benchmark(group="setup")
+def test_cached(benchmark, jager):
+    ReplayPlayer(jager.version, 0.5)
+    benchmark(ReplayPlayer, jager.version, 0.5)
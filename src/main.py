@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Dict, Iterator
 import argparse
 import array
 import enum
@@ -8,6 +8,8 @@ import sys
 
 
 from packaging import version
+from replay_unpack.cache import PacketStreamCache
+from replay_unpack.clients.wows.helper import build_definitions_bundle
 from replay_unpack.parser import ReplayParser
 
 
@@ -31,7 +33,19 @@ def default(obj: Any):
     raise ValueError(f"Unable to serialize object of class {object.__class__}")
 
 
-if __name__ == "__main__":
+def iter_replay_paths(paths) -> Iterator[str]:
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith(".wowsreplay"):
+                    yield os.path.join(root, name)
+
+
+def get_arg_parser() -> argparse.ArgumentParser:
     # TODO: add description/help
 
     parser = argparse.ArgumentParser(
@@ -46,6 +60,40 @@ if __name__ == "__main__":
     sub_unpack.add_argument("-p", "--period", type=float, default=0.5)
     sub_unpack.add_argument("--strict", action=argparse.BooleanOptionalAction, default=False)
     sub_unpack.add_argument("--pretty", action=argparse.BooleanOptionalAction, default=False)
+    sub_unpack.add_argument("--stream", action=argparse.BooleanOptionalAction, default=False)
+    sub_unpack.add_argument("--cache", help="directory to cache decompressed packet streams in")
+    sub_unpack.add_argument(
+        "--typed-arrays",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="decode arrays of fixed-size elements into typed columns",
+    )
+
+    sub_scan = subparsers.add_parser(
+        "scan", help="read replay headers only and report metadata as json lines"
+    )
+    sub_scan.add_argument("replays", nargs="+", help="replay files or directories")
+    sub_scan.add_argument(
+        "-o",
+        "--output",
+        type=argparse.FileType("w"),
+        default=sys.stdout,
+        help="file to write the json lines to, stdout by default",
+    )
+
+    sub_index = subparsers.add_parser(
+        "index", help="report packet counts and byte volumes per packet type"
+    )
+    sub_index.add_argument("replay")
+    sub_index.add_argument("output", nargs="?", type=argparse.FileType("w"), default=sys.stdout)
+    sub_index.add_argument("--save", action=argparse.BooleanOptionalAction, default=False)
+    sub_index.add_argument("--cache", help="directory to cache decompressed packet streams in")
+
+    sub_bundle = subparsers.add_parser(
+        "bundle", help="precompile entity definitions of game versions for faster startup"
+    )
+    sub_bundle.add_argument("versions", nargs="+", help="game versions, e.g. 12_6_0")
+    sub_bundle.add_argument("--typed-arrays", action=argparse.BooleanOptionalAction, default=False)
 
     sub_render = subparsers.add_parser("render", help="generate minimap-style timelapse video")
     sub_render.add_argument("replay", type=argparse.FileType("rb"))
@@ -54,7 +102,11 @@ if __name__ == "__main__":
     sub_render.add_argument("-p", "--period", type=float, default=0.5)
     sub_render.add_argument("-q", "--quality", type=int, choices=range(1, 11), default=8)
 
-    args = parser.parse_args()
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_arg_parser().parse_args()
 
     if args.command == "unpack":
         if args.output is None:
@@ -64,12 +116,69 @@ if __name__ == "__main__":
                 else open(os.path.splitext(args.replay.name)[0] + ".replaydata", "w")
             )
 
-        parser = ReplayParser(args.replay, args.strict)
+        cache = PacketStreamCache(args.cache) if args.cache else None
+        parser = ReplayParser(args.replay, args.strict, cache, args.typed_arrays)
         indent = 4 if args.pretty else None
         args.output.write(
-            json.dumps(parser.parse(args.period).model_dump(), indent=indent, default=default)
+            json.dumps(
+                parser.parse(args.period, args.stream).model_dump(), indent=indent, default=default
+            )
         )
 
+    if args.command == "scan":
+        seen: Dict[int, str] = {}
+
+        for path in iter_replay_paths(args.replays):
+            result: Dict[str, Any] = {"path": path}
+
+            try:
+                with open(path, "rb") as fp:
+                    header = ReplayParser(fp).scan_header()
+            except (OSError, ValueError) as e:
+                result["problems"] = [str(e)]
+            else:
+                result.update(
+                    arena_id=header.arena_id,
+                    owner_account_id=header.owner_account_id,
+                    version=header.arena_info.get("clientVersionFromXml"),
+                    map=header.arena_info.get("mapName"),
+                    date=header.arena_info.get("dateTime"),
+                    block_count=header.block_count,
+                    raw_size=header.raw_size,
+                    compressed_size=header.compressed_size,
+                    payload_size=header.payload_size,
+                    problems=header.get_problems(),
+                )
+
+                if header.arena_id is not None:
+                    if header.arena_id in seen:
+                        result["duplicate_of"] = seen[header.arena_id]
+                    else:
+                        seen[header.arena_id] = path
+
+            args.output.write(json.dumps(result) + "\n")
+
+    if args.command == "index":
+        cache = PacketStreamCache(args.cache) if args.cache else None
+        with ReplayParser(args.replay, cache=cache) as parser:
+            index = parser.get_index(args.save)
+
+        volumes = index.get_volumes()
+        args.output.write(
+            json.dumps(
+                {
+                    hex(type_): {"count": count, "bytes": volumes[type_]}
+                    for type_, count in sorted(index.get_counts().items())
+                },
+                indent=4,
+            )
+            + "\n"
+        )
+
+    if args.command == "bundle":
+        for game_version in args.versions:
+            print(build_definitions_bundle(game_version, args.typed_arrays))
+
     if args.command == "render":
         assert args.period > 0, "period must be greater than 0 in render"
 
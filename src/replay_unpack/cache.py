@@ -0,0 +1,109 @@
+from typing import Iterable, Iterator, Optional, Union
+import hashlib
+import mmap
+import os
+import tempfile
+
+DEFAULT_MAX_SIZE = 2 * 1024**3  # 2 GiB
+
+
+def hash_payload(chunks: Iterable[bytes]) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PacketStreamCache:
+    """
+    On-disk cache of decompressed packet streams, keyed by a hash of the encrypted
+    replay payload. Entries are stored as the raw packet stream, so a hit is simply
+    memory-mapped and played without any decryption or decompression. The cache is
+    bounded in size and evicts the least recently used entries first.
+    """
+
+    SUFFIX = ".packets"
+
+    def __init__(self, directory: Union[str, os.PathLike], max_size: int = DEFAULT_MAX_SIZE):
+        self.directory: str = os.fspath(directory)
+        self.max_size: int = max_size
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key: str, size: int) -> Optional[Union[bytes, mmap.mmap]]:
+        """
+        Get the cached packet stream of the given size or None on a cache miss.
+        The stream is a memory mapping the caller closes once done with it,
+        mapped entries can not be evicted on Windows.
+        """
+        path = self._get_path(key)
+
+        try:
+            with open(path, "rb") as fp:
+                if os.fstat(fp.fileno()).st_size != size:
+                    return None
+                if not size:
+                    return b""
+                mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+
+        return mapped
+
+    def put(self, key: str, raw: bytes):
+        for _ in self.write_through(key, (raw,)):
+            pass
+
+    def write_through(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass chunks of a packet stream through while storing them. The entry only
+        becomes visible once all chunks were consumed, an interrupted stream is
+        discarded.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                for chunk in chunks:
+                    fp.write(chunk)
+                    yield chunk
+            os.replace(temp_path, self._get_path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits into max_size.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # evicted by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # evicted by another process
+                pass
+            except OSError:  # still mapped on Windows, left for a later eviction
+                continue
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.SUFFIX):
+                os.remove(entry.path)
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
@@ -1,16 +1,18 @@
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 import array
 import io
-import json
-import os
 import struct
 
 from packaging.version import Version
 import packaging.version
 
 from replay_unpack.core import IBattleController
-from replay_unpack.core.entity import Entity
-from replay_unpack.core.entity_def.data_types.nested_types import PyFixedDict, PyFixedList
+from replay_unpack.core.entity import Entity, Subscriptions
+from replay_unpack.core.entity_def.data_types.nested_types import (
+    PyFixedDict,
+    PyFixedList,
+    PyTypedArray,
+)
 from replay_unpack.models import (
     Achievement,
     BattleLogic,
@@ -40,6 +42,8 @@ from replay_unpack.models import (
 )
 from replay_unpack.utils import restricted_loads, to_snake_case, unpack_plane_id, unpack_values
 
+from .helper import get_constants
+
 
 BATTLE_RESULTS_ALIASES = {
     "interactions": "CLIENT_VEH_INTERACTION_DETAILS",
@@ -51,7 +55,6 @@ POSITION_AND_YAW_PATTERN = (
     (-3.141592753589793, 3.141592753589793, 8),
 )
 DAMAGE_STATS_TYPES = ["ENEMY", "ALLY", "SPOT", "AGRO"]
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 
 class PlayersInfo:
@@ -160,15 +163,17 @@ class BattleController(IBattleController):
         self._vehicle_state: Dict[int, VehicleState] = {}
         self._version: Optional[Version] = None
 
+        self._subscriptions: Subscriptions = Subscriptions()
+
         for entity_type, methods in self.METHOD_CALLS.items():
             for method in methods:
-                Entity.subscribe_method_call(
+                self._subscriptions.subscribe_method_call(
                     entity_type, method, getattr(self, to_snake_case(method))
                 )
 
         for entity_type, properties in self.PROPERTY_CHANGES.items():
             for property in properties:
-                Entity.subscribe_property_change(
+                self._subscriptions.subscribe_property_change(
                     entity_type,
                     property,
                     getattr(self, entity_type.lower() + "_" + to_snake_case(property)),
@@ -177,50 +182,55 @@ class BattleController(IBattleController):
         for entity_type, properties in self.NESTED_PROPERTY_CHANGES.items():
             for property in properties:
                 name = property[property.rfind(".") + 1 :]
-                Entity.subscribe_nested_property_change(
+                self._subscriptions.subscribe_nested_property_change(
                     entity_type,
                     property,
                     getattr(self, entity_type.lower() + "_" + to_snake_case(name)),
                 )
 
     def load_constants(self, version: str) -> Dict[str, Any]:
-        with open(os.path.join(BASE_DIR, "versions", version, "constants.json")) as fp:
-            return json.load(fp)
-
-    def get_data(self) -> ReplayData:
-        if self.period > 0:  # force snapshot to handle sub-period events
+        return get_constants(version)
+
+    def get_data(self, partial: bool = False) -> ReplayData:
+        """
+        Data of everything played so far. With partial, playing was stopped before
+        the end of the replay on purpose, so what is not known yet is left None and
+        the data is not validated. Otherwise the replay has to be complete.
+        """
+        battle_logic_entity = self._find_battle_logic() if partial else self.battle_logic
+
+        if self.period > 0 and battle_logic_entity is not None:
+            # force snapshot to handle sub-period events
             self.take_snapshot()
 
         self._events.squadron_counter.append(len(self._events.squadron_plane_id))
 
-        raw = self.battle_logic.properties["client"]
-        battle_logic = BattleLogic(
-            battle_result=BattleResult(
-                winner_team_id=raw["battleResult"]["winnerTeamId"],
-                finish_reason=self.constants["FINISH_REASONS"][
-                    str(raw["battleResult"]["finishReason"])
-                ],
-            ),
-            battle_type=self.constants["BATTLE_TYPES"][str(raw["battleType"])],
-            duration=raw["duration"],
-            lose_score=raw["state"]["missions"]["teamLoseScore"],
-            win_score=raw["state"]["missions"]["teamWinScore"],
-        )
-
-        assert self._battle_results is not None, "Replay is incomplete."
+        battle_logic = None
+        if battle_logic_entity is not None:
+            raw = battle_logic_entity.properties["client"]
+            battle_logic = BattleLogic(
+                battle_result=BattleResult(
+                    winner_team_id=raw["battleResult"]["winnerTeamId"],
+                    finish_reason=self.constants["FINISH_REASONS"][
+                        str(raw["battleResult"]["finishReason"])
+                    ],
+                ),
+                battle_type=self.constants["BATTLE_TYPES"][str(raw["battleType"])],
+                duration=raw["duration"],
+                lose_score=raw["state"]["missions"]["teamLoseScore"],
+                win_score=raw["state"]["missions"]["teamWinScore"],
+            )
 
-        return ReplayData(
-            version=self._version,  # type: ignore
-            arena_id=self._arena_id,  # type: ignore
-            map=self._map,  # type: ignore
+        data = dict(
+            version=self._version,
+            arena_id=self._arena_id,
+            map=self._map,
             battle_logic=battle_logic,
-            game_mode=self.constants["GAME_MODES"][
-                str(self._battle_results["common"]["game_mode"])
-            ],
-            owner_account_id=self._owner_account_id,  # type: ignore
-            owner_avatar_id=self._owner_avatar_id,  # type: ignore
-            owner_id=self._owner_id,  # type: ignore
-            owner_vehicle_id=self._owner_vehicle_id,  # type: ignore
+            game_mode=None,
+            owner_account_id=self._owner_account_id,
+            owner_avatar_id=self._owner_avatar_id,
+            owner_id=self._owner_id,
+            owner_vehicle_id=self._owner_vehicle_id,
             crew_skills=self._crew_skills,
             drops=self._drops,
             players=self._players,
@@ -230,6 +240,16 @@ class BattleController(IBattleController):
             events=self._events,
         )
 
+        # battle results are the last thing a replay has
+        if partial and self._battle_results is None:
+            return ReplayData.model_construct(**data)
+
+        assert self._battle_results is not None, "Replay is incomplete."
+        data["game_mode"] = self.constants["GAME_MODES"][
+            str(self._battle_results["common"]["game_mode"])
+        ]
+        return ReplayData(**data)
+
     @property
     def current_time(self):
         return self._current_time
@@ -325,13 +345,26 @@ class BattleController(IBattleController):
     def owner(self):
         return self._players_info.players[self._owner_id]
 
+    @property
+    def players(self) -> Dict[int, Player]:
+        """
+        Players by id, known once the arena state was received.
+        """
+        return self._players
+
     @property
     def battle_logic(self):
+        entity = self._find_battle_logic()
+        assert entity is not None, "BattleLogic was not created yet."
+        return entity
+
+    def _find_battle_logic(self) -> Optional[Entity]:
         if self._battle_logic_id:
             return self.entities[self._battle_logic_id]
 
         entity_id, entity = next(
-            (eid, e) for eid, e in self._entities.items() if e.get_name() == "BattleLogic"
+            ((eid, e) for eid, e in self._entities.items() if e.get_name() == "BattleLogic"),
+            (None, None),
         )
         self._battle_logic_id = entity_id
         return entity
@@ -340,6 +373,10 @@ class BattleController(IBattleController):
     def entities(self):
         return self._entities
 
+    @property
+    def subscriptions(self) -> Subscriptions:
+        return self._subscriptions
+
     def create_entity(self, entity: Entity):
         self._entities[entity.id] = entity
 
@@ -348,7 +385,7 @@ class BattleController(IBattleController):
             self._events.smokes[entity.id] = SmokeScreen(
                 spawn_time=self.current_time,
                 radius=raw["radius"],
-                points=raw["points"],
+                points=list(raw["points"]),
                 bound_left=0,
                 bound_right=len(raw["points"]) - 1,
             )
@@ -635,7 +672,7 @@ class BattleController(IBattleController):
             )
         )
 
-    def avatar_ribbons(self, avatar: Entity, value: Union[PyFixedList, PyFixedDict]):
+    def avatar_ribbons(self, avatar: Entity, value: Union[PyFixedList, PyTypedArray, PyFixedDict]):
         # this is a private property, but make sure anyways
         if avatar.id != self._owner_avatar_id:
             return
@@ -646,7 +683,7 @@ class BattleController(IBattleController):
 
             self._events.ribbons.append(self._ribbons.copy())
 
-        if isinstance(value, PyFixedList):
+        if isinstance(value, (PyFixedList, PyTypedArray)):
             update(*value)
         else:
             update(value)
@@ -662,9 +699,8 @@ class BattleController(IBattleController):
         self.update_stats()
 
     def update_minimap_vision_info(self, avatar: Entity, shipsMinimapDiff, buildingsMinimapDiff):
-        for ship_diff in shipsMinimapDiff:
-            x, y, yaw = unpack_values(ship_diff["packedData"], POSITION_AND_YAW_PATTERN)
-            vehicle_id = ship_diff["vehicleID"]
+        for vehicle_id, packed_data in self._iter_minimap_diffs(shipsMinimapDiff):
+            x, y, yaw = unpack_values(packed_data, POSITION_AND_YAW_PATTERN)
 
             if (x == -2500) and (y == -2500):
                 self._vehicle_state[vehicle_id].visibility_flags = 0
@@ -672,9 +708,8 @@ class BattleController(IBattleController):
             else:
                 self._events.vehicle_states[vehicle_id].position_diff.extend((x, y, yaw))
 
-        for building_diff in buildingsMinimapDiff:
-            x, y, yaw = unpack_values(building_diff["packedData"], POSITION_AND_YAW_PATTERN)
-            building_id = building_diff["vehicleID"]
+        for building_id, packed_data in self._iter_minimap_diffs(buildingsMinimapDiff):
+            x, y, yaw = unpack_values(packed_data, POSITION_AND_YAW_PATTERN)
 
             if (x == -2500) and (y == -2500):
                 self._building_state[building_id].visible = False
@@ -682,6 +717,13 @@ class BattleController(IBattleController):
                 self._events.building_states[building_id].position = (x, y, yaw)
                 self._building_state[building_id].visible = True
 
+    @staticmethod
+    def _iter_minimap_diffs(diffs) -> Iterable[Tuple[int, int]]:
+        if isinstance(diffs, PyTypedArray):
+            # typed columns are read as a whole instead of materializing every element
+            return zip(diffs.column("vehicleID"), diffs.column("packedData"))
+        return ((diff["vehicleID"], diff["packedData"]) for diff in diffs)
+
     def receive_ward_added(
         self,
         avatar: Entity,
@@ -1,13 +1,73 @@
 import importlib
+import json
 import os
+import threading
+from typing import Any, Dict, Optional, Tuple
 
 from replay_unpack.core.entity_def.definitions import Definitions
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+BUNDLE_NAMES = {False: "definitions.bundle", True: "definitions.typed.bundle"}
 
+# definitions and constants are parsed once per process and shared by all players,
+# they are treated as read-only once built
+_cache_lock = threading.Lock()
+_definitions: Dict[Tuple[str, bool], Definitions] = {}
+_constants: Dict[str, Dict[str, Any]] = {}
 
-def get_definitions(version):
-    return Definitions(os.path.join(BASE_DIR, "versions", version))
+
+def get_definitions(version: str, typed_arrays: bool = False) -> Definitions:
+    """
+    Get entity definitions by game version, cached for the lifetime of the process.
+    With typed_arrays, arrays of fixed-size elements decode into typed columns.
+    """
+    key = (version, typed_arrays)
+    with _cache_lock:
+        if key not in _definitions:
+            base_dir = os.path.join(BASE_DIR, "versions", version)
+            definitions = Definitions.load_bundle(
+                os.path.join(base_dir, BUNDLE_NAMES[typed_arrays]), base_dir
+            )
+            if definitions is None:
+                definitions = Definitions(base_dir, typed_arrays)
+            _definitions[key] = definitions
+        return _definitions[key]
+
+
+def build_definitions_bundle(version: str, typed_arrays: bool = False) -> str:
+    """
+    Parse the definitions of a game version from XML and store them as a bundle
+    next to them, which get_definitions then loads instead. Returns the bundle path.
+    """
+    base_dir = os.path.join(BASE_DIR, "versions", version)
+    path = os.path.join(base_dir, BUNDLE_NAMES[typed_arrays])
+    Definitions(base_dir, typed_arrays).save_bundle(path, base_dir)
+    return path
+
+
+def get_constants(version: str) -> Dict[str, Any]:
+    """
+    Get game constants by game version, cached for the lifetime of the process.
+    """
+    with _cache_lock:
+        if version not in _constants:
+            with open(os.path.join(BASE_DIR, "versions", version, "constants.json")) as fp:
+                _constants[version] = json.load(fp)
+        return _constants[version]
+
+
+def clear_cache(version: Optional[str] = None):
+    """
+    Drop cached definitions and constants of the given version, or of all versions.
+    """
+    with _cache_lock:
+        if version is None:
+            _definitions.clear()
+            _constants.clear()
+        else:
+            for typed_arrays in BUNDLE_NAMES:
+                _definitions.pop((version, typed_arrays), None)
+            _constants.pop(version, None)
 
 
 def get_controller(version):
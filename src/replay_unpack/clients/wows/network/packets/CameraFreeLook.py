@@ -1,9 +1,6 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import Record
 
-from replay_unpack.core import PrettyPrintObjectMixin
 
-
-class CameraFreeLook(PrettyPrintObjectMixin):
-    def __init__(self, stream):
-        (self.locked,) = struct.unpack("?", stream.read(1))
+class CameraFreeLook(Record):
+    FIELDS = (("locked", "?"),)
@@ -1,9 +1,6 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import Record
 
-from replay_unpack.core import PrettyPrintObjectMixin
 
-
-class CameraMode(PrettyPrintObjectMixin):
-    def __init__(self, stream):
-        (self.mode,) = struct.unpack("i", stream.read(4))
+class CameraMode(Record):
+    FIELDS = (("mode", "i"),)
@@ -1,18 +1,18 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import BinaryStream, Record, Vector3
 
-from replay_unpack.core import PrettyPrintObjectMixin
-from replay_unpack.core.network.types import BinaryStream
-from replay_unpack.core.network.types import Vector3
 
+class EntityCreate(Record):
+    FIELDS = (
+        ("entityID", "i"),
+        ("type", "h"),
+        ("spaceId", "i"),
+        ("vehicleId", "i"),
+        ("position", Vector3),
+        ("direction", Vector3),
+    )
+    __slots__ = ("state",)
 
-class EntityCreate(PrettyPrintObjectMixin):
     def __init__(self, stream):
-        (self.entityID,) = struct.unpack("i", stream.read(4))
-        (self.type,) = struct.unpack("h", stream.read(2))
-        (self.spaceId,) = struct.unpack("i", stream.read(4))
-        (self.vehicleId,) = struct.unpack("i", stream.read(4))
-        self.position = Vector3(stream)
-        self.direction = Vector3(stream)
-
+        super().__init__(stream)
         self.state = BinaryStream(stream)
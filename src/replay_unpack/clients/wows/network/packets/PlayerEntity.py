@@ -1,9 +1,6 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import Record
 
-from replay_unpack.core import PrettyPrintObjectMixin
 
-
-class PlayerEntity(PrettyPrintObjectMixin):
-    def __init__(self, stream):
-        (self.vehicleId,) = struct.unpack("i", stream.read(4))
+class PlayerEntity(Record):
+    FIELDS = (("vehicleId", "i"),)
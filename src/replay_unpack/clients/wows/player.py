@@ -1,9 +1,15 @@
 import struct
 from io import BytesIO
+from typing import Any, Callable, Dict, List
+
+from packaging.version import Version as GameVersion
 
 from replay_unpack.core import Entity
 from replay_unpack.core.network.player import ControlledPlayerBase
+from replay_unpack import models
 from replay_unpack.models import ReplayData
+from replay_unpack.utils import CamouflageInfo, PlayerMode
+from .controller import PlayersInfo
 from .helper import get_definitions, get_controller
 from .network.packets import (
     BasePlayerCreate,
@@ -25,16 +31,41 @@ from .network.packets import (
 
 
 class ReplayPlayer(ControlledPlayerBase):
-    def get_data(self) -> ReplayData:
-        return self._battle_controller.get_data()
+    # packet class -> name of its handler, packets without one are not deserialized
+    HANDLERS = {
+        BasePlayerCreate: "_on_base_player_create",
+        CellPlayerCreate: "_on_cell_player_create",
+        EntityEnter: "_on_entity_enter",
+        EntityLeave: "_on_entity_leave",
+        EntityCreate: "_on_entity_create",
+        EntityProperty: "_on_entity_property",
+        EntityMethod: "_on_entity_method",
+        Position: "_on_position",
+        Version: "_on_version",
+        PlayerEntity: "_on_player_entity",
+        BattleResults: "_on_battle_results",
+        NestedProperty: "_on_nested_property",
+        Map: "_on_map",
+        PlayerPosition: "_on_player_position",
+    }
+
+    def __init__(self, version: GameVersion, period: float, typed_arrays: bool = False):
+        # definitions are loaded by the base class, so the flag has to be set first
+        self.typed_arrays = typed_arrays
+        super().__init__(version, period)
+
+        self._handlers = self._get_handlers()
+
+    def get_data(self, partial: bool = False) -> ReplayData:
+        return self._battle_controller.get_data(partial)
 
     def _get_definitions(self):
         v = self.version
 
         try:
-            return get_definitions("_".join(str(n) for n in v.release))
+            return get_definitions("_".join(str(n) for n in v.release), self.typed_arrays)
         except RuntimeError:
-            return get_definitions(f"{v.major}_{v.minor}_{v.micro}")
+            return get_definitions(f"{v.major}_{v.minor}_{v.micro}", self.typed_arrays)
 
     def _get_controller(self):
         v = self.version
@@ -49,122 +80,170 @@ class ReplayPlayer(ControlledPlayerBase):
     def _get_packets_mapping(self):
         return PACKETS_MAPPING
 
+    def _get_shared_objects(self) -> List[Any]:
+        # constants are loaded once per version like definitions
+        return [self._battle_controller.constants, *super()._get_shared_objects()]
+
+    def _get_checkpoint_classes(self) -> List[type]:
+        # everything in the state of the controller
+        classes = [
+            item
+            for item in vars(models).values()
+            if isinstance(item, type) and item.__module__ == models.__name__
+        ]
+        return [
+            PlayersInfo,
+            CamouflageInfo,
+            PlayerMode,
+            *classes,
+            *super()._get_checkpoint_classes(),
+        ]
+
+    def _get_handlers(self) -> Dict[int, Callable[[Any], None]]:
+        """
+        Map packet type ids of this version's packet mapping to bound handlers.
+        Subclasses for other versions override _get_packets_mapping and handlers.
+        """
+        return {
+            type_: getattr(self, self.HANDLERS[packet_class])
+            for type_, packet_class in self._mapping.items()
+            if packet_class in self.HANDLERS
+        }
+
+    def _dispatch_packet(self, packet):
+        # every packet advances the clock, snapshots are taken by time
+        self._battle_controller.current_time = packet.time
+
+        handler = self._handlers.get(packet.type)
+        if handler is not None:
+            handler(self._mapping[packet.type](packet.raw_data))
+
     def _process_packet(self, packet, t: float):
         self._battle_controller.current_time = t
 
-        if isinstance(packet, BasePlayerCreate):
-            if packet.entityId in self._battle_controller.entities:
-                base_player = self._battle_controller.entities[packet.entityId]
-            else:
-                base_player = Entity(
-                    id_=packet.entityId,
-                    spec=self._definitions.get_entity_def_by_name("Avatar"),
-                )
+        for packet_class, name in self.HANDLERS.items():
+            if isinstance(packet, packet_class):
+                getattr(self, name)(packet)
+                break
+
+    def _on_base_player_create(self, packet: BasePlayerCreate):
+        if packet.entityId in self._battle_controller.entities:
+            base_player = self._battle_controller.entities[packet.entityId]
+        else:
+            base_player = Entity(
+                id_=packet.entityId,
+                spec=self._definitions.get_entity_def_by_name("Avatar"),
+                subscriptions=self._battle_controller.subscriptions,
+            )
 
-            io = BytesIO(packet.value.value)
-            for index, prop in enumerate(base_player.base_properties):
-                base_player.set_base_property(index, io)
+        io = BytesIO(packet.value.value)
+        for index, prop in enumerate(base_player.base_properties):
+            base_player.set_base_property(index, io, lazy=True)
+
+        self._battle_controller.create_entity(base_player)
+        self._battle_controller.on_player_enter_world(packet.entityId)
+
+    def _on_cell_player_create(self, packet: CellPlayerCreate):
+        if packet.entityId in self._battle_controller.entities:
+            cell_player = self._battle_controller.entities[packet.entityId]
+        else:
+            cell_player = Entity(
+                id_=packet.entityId,
+                spec=self._definitions.get_entity_def_by_name("Avatar"),
+                subscriptions=self._battle_controller.subscriptions,
+            )
 
-            self._battle_controller.create_entity(base_player)
-            self._battle_controller.on_player_enter_world(packet.entityId)
+        io = packet.value.io()
+        for index, prop in enumerate(cell_player.client_properties_internal):
+            cell_player.set_client_property_internal(index, io, lazy=True)
 
-        elif isinstance(packet, CellPlayerCreate):
-            if packet.entityId in self._battle_controller.entities:
-                cell_player = self._battle_controller.entities[packet.entityId]
-            else:
-                cell_player = Entity(
-                    id_=packet.entityId,
-                    spec=self._definitions.get_entity_def_by_name("Avatar"),
-                )
+        self._battle_controller.create_entity(cell_player)
 
-            io = packet.value.io()
-            for index, prop in enumerate(cell_player.client_properties_internal):
-                cell_player.set_client_property_internal(index, io)
+    def _on_entity_enter(self, packet: EntityEnter):
+        self._battle_controller.entities[packet.entityId].is_on_aoi = True
 
-            self._battle_controller.create_entity(cell_player)
+    def _on_entity_leave(self, packet: EntityLeave):
+        self._battle_controller.entities[packet.entityId].is_on_aoi = False
+        self._battle_controller.leave_entity(packet.entityId)
 
-        elif isinstance(packet, EntityEnter):
-            self._battle_controller.entities[packet.entityId].is_in_aoi = True
+    def _on_entity_create(self, packet: EntityCreate):
+        entity = Entity(
+            id_=packet.entityID,
+            spec=self._definitions.get_entity_def_by_index(packet.type),
+            subscriptions=self._battle_controller.subscriptions,
+        )
 
-        elif isinstance(packet, EntityLeave):
-            self._battle_controller.entities[packet.entityId].is_in_aoi = False
-            self._battle_controller.leave_entity(packet.entityId)
+        entity.position = packet.position.x, packet.position.y, packet.position.z
 
-        elif isinstance(packet, EntityCreate):
-            entity = Entity(
-                id_=packet.entityID,
-                spec=self._definitions.get_entity_def_by_index(packet.type),
-            )
+        values = packet.state.io()
+        (values_count,) = struct.unpack("B", values.read(1))
+        for i in range(values_count):
+            k = values.read(1)
+            (idx,) = struct.unpack("B", k)
+            entity.set_client_property(idx, values, lazy=True)
+        assert values.read() == b""
+        self._battle_controller.create_entity(entity)
+
+    def _on_entity_property(self, packet: EntityProperty):
+        entity = self._battle_controller.entities[packet.objectID]
+        entity.set_client_property(packet.messageId, packet.data.io())
+
+    def _on_entity_method(self, packet: EntityMethod):
+        entity = self._battle_controller.entities[packet.entityId]
+        entity.call_client_method(packet.messageId, packet.data.io())
+
+    def _on_position(self, packet: Position):
+        position = packet.position
+        self._battle_controller.entities[packet.entityId].set_volatiles(
+            (position.x, position.y, position.z), packet.yaw, packet.pitch, packet.roll
+        )
+
+    def _on_version(self, packet: Version):
+        self._battle_controller.version = packet.version
+
+    def _on_player_entity(self, packet: PlayerEntity):
+        self._battle_controller.owner_vehicle_id = packet.vehicleId
 
-            entity.position = packet.position.x, packet.position.y, packet.position.z
-
-            values = packet.state.io()
-            (values_count,) = struct.unpack("B", values.read(1))
-            for i in range(values_count):
-                k = values.read(1)
-                (idx,) = struct.unpack("B", k)
-                entity.set_client_property(idx, values)
-            assert values.read() == b""
-            self._battle_controller.create_entity(entity)
-
-        elif isinstance(packet, EntityProperty):
-            entity = self._battle_controller.entities[packet.objectID]
-            entity.set_client_property(packet.messageId, packet.data.io())
-
-        elif isinstance(packet, EntityMethod):
-            entity = self._battle_controller.entities[packet.entityId]
-            entity.call_client_method(packet.messageId, packet.data.io())
-
-        elif isinstance(packet, Position):
-            self._battle_controller.entities[packet.entityId].position = packet.position
-            self._battle_controller.entities[packet.entityId].yaw = packet.yaw
-            self._battle_controller.entities[packet.entityId].pitch = packet.pitch
-            self._battle_controller.entities[packet.entityId].roll = packet.roll
-
-        elif isinstance(packet, Version):
-            self._battle_controller.version = packet.version
-
-        elif isinstance(packet, PlayerEntity):
-            self._battle_controller.owner_vehicle_id = packet.vehicleId
-
-        elif isinstance(packet, BattleResults):
-            self._battle_controller.battle_results = packet.data
-
-        elif isinstance(packet, NestedProperty):
-            e = self._battle_controller.entities[packet.entity_id]
-            packet.read_and_apply(e)
-
-        elif isinstance(packet, Map):
-            self._battle_controller.map = packet.name
-
-        elif isinstance(packet, PlayerPosition):
-            """
-            The first entity ID is the primary position being updated
-            Avatar only packets have no position until death and are linked to a vehicle
-            After death they have no Vehicle ID and use a position instead
-            That is, before death, only the first entity ID has a position
-            """
-
-            try:
-                if packet.entityId2 != (0,):  # first entity ID gets position of second
-                    master_entity = self._battle_controller.entities[packet.entityId2]
-                    slave_entity = self._battle_controller.entities[packet.entityId1]
-
-                    slave_entity.position = master_entity.position
-                    slave_entity.yaw = master_entity.yaw
-                    slave_entity.pitch = master_entity.pitch
-                    slave_entity.roll = master_entity.roll
-
-                elif packet.entityId1 and not packet.entityId2:
-                    e = self._battle_controller.entities[packet.entityId1]
-
-                    e.position = packet.position
-                    e.yaw = packet.yaw
-                    e.pitch = packet.pitch
-                    e.roll = packet.roll
-
-                else:  # no primary OR secondary entity (impossible?)
-                    pass
-
-            except KeyError as e:  # entity/entities not created yet
+    def _on_battle_results(self, packet: BattleResults):
+        self._battle_controller.battle_results = packet.data
+
+    def _on_nested_property(self, packet: NestedProperty):
+        e = self._battle_controller.entities[packet.entity_id]
+        packet.read_and_apply(e)
+
+    def _on_map(self, packet: Map):
+        self._battle_controller.map = packet.name
+
+    def _on_player_position(self, packet: PlayerPosition):
+        """
+        The first entity ID is the primary position being updated
+        Avatar only packets have no position until death and are linked to a vehicle
+        After death they have no Vehicle ID and use a position instead
+        That is, before death, only the first entity ID has a position
+        """
+
+        try:
+            if packet.entityId2 != 0:  # first entity ID gets position of second
+                master_entity = self._battle_controller.entities[packet.entityId2]
+                slave_entity = self._battle_controller.entities[packet.entityId1]
+
+                slave_entity.set_volatiles(
+                    master_entity.position,
+                    master_entity.yaw,
+                    master_entity.pitch,
+                    master_entity.roll,
+                )
+
+            elif packet.entityId1 and not packet.entityId2:
+                e = self._battle_controller.entities[packet.entityId1]
+
+                position = packet.position
+                e.set_volatiles(
+                    (position.x, position.y, position.z), packet.yaw, packet.pitch, packet.roll
+                )
+
+            else:  # no primary OR secondary entity (impossible?)
                 pass
+
+        except KeyError as e:  # entity/entities not created yet
+            pass
@@ -0,0 +1,224 @@
+# coding=utf-8
+"""
+Columnar extraction of entity positions straight from the packet stream, for analytics
+that only need trajectories and not the rest of the replay.
+"""
+import array
+import mmap
+import struct
+from typing import Union
+
+from replay_unpack.core.network.net_packet import HEADER
+from replay_unpack.core.network.packet_index import PacketIndex
+from .network.packets import PACKETS_MAPPING, EntityCreate, PlayerPosition, Position
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, fall back to the stdlib implementation
+    np = None
+
+PACKET_TYPES = {packet_class: type_ for type_, packet_class in PACKETS_MAPPING.items()}
+POSITION_TYPE = PACKET_TYPES[Position]
+PLAYER_POSITION_TYPE = PACKET_TYPES[PlayerPosition]
+ENTITY_CREATE_TYPE = PACKET_TYPES[EntityCreate]
+
+# entity id, position and yaw of the packets, in the order of the columns
+POSITION_FIELDS = ("entityId", "position", "yaw")
+PLAYER_POSITION_FIELDS = ("entityId1", "entityId2", "position", "yaw")
+# created entities start out with a yaw of zero
+ENTITY_CREATE_FIELDS = ("entityID", "position")
+
+
+class Positions:
+    """
+    Position updates in stream order as columns: packet time, entity id,
+    coordinates and yaw. Columns are NumPy arrays when NumPy is installed
+    and array.array otherwise.
+
+    Position packets give the position of their entity. PlayerPosition packets
+    linked to another entity give the last known position of that entity,
+    they are dropped if it has none yet. Unlinked ones give their own position.
+    Entities are known from their creation on, like when the replay is played.
+    """
+
+    COLUMNS = (
+        ("time", "f"),
+        ("entity_id", "i"),
+        ("x", "f"),
+        ("y", "f"),
+        ("z", "f"),
+        ("yaw", "f"),
+    )
+
+    def __init__(self, time, entity_id, x, y, z, yaw):
+        self.time = time
+        self.entity_id = entity_id
+        self.x = x
+        self.y = y
+        self.z = z
+        self.yaw = yaw
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def extract(
+        cls, raw: Union[bytes, mmap.mmap], index: PacketIndex, use_numpy: bool = True
+    ) -> "Positions":
+        """
+        Collect position updates from the packets the index points to,
+        with use_numpy in one vectorized pass if NumPy is installed.
+        """
+        assert len(raw) == index.raw_size, "Index does not belong to this packet stream"
+
+        if use_numpy and np is not None:
+            return cls._extract_numpy(raw, index)
+        return cls._extract_array(raw, index)
+
+    @classmethod
+    def _extract_array(cls, raw: Union[bytes, mmap.mmap], index: PacketIndex) -> "Positions":
+        columns = [array.array(typecode) for _, typecode in cls.COLUMNS]
+        time, entity_id, x, y, z, yaw = (column.append for column in columns)
+
+        position = struct.Struct(_get_format(Position, POSITION_FIELDS))
+        player_position = struct.Struct(_get_format(PlayerPosition, PLAYER_POSITION_FIELDS))
+        entity_create = struct.Struct(_get_format(EntityCreate, ENTITY_CREATE_FIELDS))
+
+        # last position and yaw of every entity, for linked PlayerPosition packets
+        last = {}
+        offsets = index.offsets
+        sizes = index.sizes
+        times = index.times
+        header_size = HEADER.size
+
+        for i in index.find((POSITION_TYPE, PLAYER_POSITION_TYPE, ENTITY_CREATE_TYPE)):
+            offset = offsets[i] + header_size
+            if index.types[i] == ENTITY_CREATE_TYPE:
+                _check_size(EntityCreate, sizes[i])
+                id_, *values = entity_create.unpack_from(raw, offset)
+                last[id_] = [*values, 0.0]
+                continue
+            elif index.types[i] == POSITION_TYPE:
+                _check_size(Position, sizes[i])
+                id_, *values = position.unpack_from(raw, offset)
+                last[id_] = values
+            else:
+                _check_size(PlayerPosition, sizes[i])
+                id_, master_id, *values = player_position.unpack_from(raw, offset)
+                if master_id:
+                    values = last.get(master_id)
+                    if values is None:
+                        continue
+                else:
+                    last[id_] = values
+
+            time(times[i])
+            entity_id(id_)
+            x(values[0])
+            y(values[1])
+            z(values[2])
+            yaw(values[3])
+
+        return cls(*columns)
+
+    @classmethod
+    def _extract_numpy(cls, raw: Union[bytes, mmap.mmap], index: PacketIndex) -> "Positions":
+        buffer = np.frombuffer(raw, dtype=np.uint8)
+        types = np.frombuffer(index.types, dtype=np.uint32)
+        sizes = np.frombuffer(index.sizes, dtype=np.uint32)
+        offsets = np.frombuffer(index.offsets, dtype=np.uint64).astype(np.int64) + HEADER.size
+
+        sequence = np.flatnonzero(types == POSITION_TYPE)
+        _check_size(Position, sizes[sequence].min(initial=Position.get_size()))
+        positions = _gather(buffer, offsets[sequence], Position, POSITION_FIELDS)
+
+        player_sequence = np.flatnonzero(types == PLAYER_POSITION_TYPE)
+        _check_size(PlayerPosition, sizes[player_sequence].min(initial=PlayerPosition.get_size()))
+        player_positions = _gather(
+            buffer, offsets[player_sequence], PlayerPosition, PLAYER_POSITION_FIELDS
+        )
+        linked = player_positions["entityId2"] != 0
+
+        create_sequence = np.flatnonzero(types == ENTITY_CREATE_TYPE)
+        _check_size(EntityCreate, sizes[create_sequence].min(initial=EntityCreate.get_size()))
+        creates = _gather(buffer, offsets[create_sequence], EntityCreate, ENTITY_CREATE_FIELDS)
+
+        # packets that carry their own position, sorted by entity and then stream order,
+        # creates come last as they only give linked packets a position to take
+        own_sequence = np.concatenate((sequence, player_sequence[~linked], create_sequence))
+        own_ids = np.concatenate(
+            (positions["entityId"], player_positions["entityId1"][~linked], creates["entityID"])
+        ).astype(np.int64)
+        own_values = np.concatenate(
+            (positions["values"], player_positions["values"][~linked], creates["values"])
+        )
+        emitted = len(own_sequence) - len(create_sequence)
+        order = np.lexsort((own_sequence, own_ids))
+        keys = (own_ids[order] << 32) + own_sequence[order]
+
+        # linked packets take the last of those of their master that came before them
+        master_ids = player_positions["entityId2"][linked].astype(np.int64)
+        found = np.searchsorted(keys, (master_ids << 32) + player_sequence[linked]) - 1
+        valid = found >= 0
+        valid[valid] = own_ids[order][found[valid]] == master_ids[valid]
+        found = order[found[valid]]
+
+        all_sequence = np.concatenate((own_sequence[:emitted], player_sequence[linked][valid]))
+        all_ids = np.concatenate(
+            (own_ids[:emitted], player_positions["entityId1"][linked][valid].astype(np.int64))
+        )
+        all_values = np.concatenate((own_values[:emitted], own_values[found]))
+
+        order = np.argsort(all_sequence, kind="stable")
+        values = all_values[order]
+        return cls(
+            np.frombuffer(index.times, dtype=np.float32)[all_sequence[order]],
+            all_ids[order].astype(np.int32),
+            *(np.ascontiguousarray(values[:, column]) for column in range(4)),
+        )
+
+
+def _check_size(record, size: int):
+    if size < record.get_size():
+        raise struct.error(f"{record.__name__} requires {record.get_size()} bytes")
+
+
+def _get_format(record, fields) -> str:
+    """
+    Struct format that picks the given fields out of a record, skipping the rest.
+    """
+    fmt = "<"
+    end = 0
+    for name in fields:
+        offset = record.get_offset(name)
+        fmt += f"{offset - end}x" if offset > end else ""
+        field_fmt = dict(record.FIELDS)[name]
+        field_fmt = field_fmt if isinstance(field_fmt, str) else field_fmt.get_format()
+        fmt += field_fmt
+        end = offset + struct.calcsize("<" + field_fmt)
+    return fmt
+
+
+def _gather(buffer, offsets, record, fields):
+    """
+    Pick entity ids, position and yaw out of the records at the offsets,
+    entity ids by field name and position with yaw as a float32 matrix under "values".
+    Records without a yaw get zero.
+    """
+    formats = {"position": "(3,)<f4", "yaw": "<f4"}
+    layout = np.dtype(
+        {
+            "names": list(fields),
+            "formats": [formats.get(name, "<i4") for name in fields],
+            "offsets": [record.get_offset(name) for name in fields],
+            "itemsize": record.get_size(),
+        }
+    )
+    rows = buffer[offsets[:, None] + np.arange(layout.itemsize)].view(layout).ravel()
+    values = np.zeros((len(rows), 4), dtype=np.float32)
+    values[:, :3] = rows["position"]
+    if "yaw" in fields:
+        values[:, 3] = rows["yaw"]
+    result = {name: rows[name] for name in fields if name not in formats}
+    result["values"] = values
+    return result
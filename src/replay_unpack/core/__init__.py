@@ -2,7 +2,7 @@
 # coding=utf-8
 
 from .battle_controller import IBattleController
-from .entity import Entity
+from .entity import Entity, Subscriptions
 from .entity_def import Definitions
 from .network.net_packet import NetPacket
 from .network.player import PlayerBase
@@ -11,6 +11,7 @@ from .pretty_print_mixin import PrettyPrintObjectMixin
 # public things that should never change
 __all__ = (
     "Entity",
+    "Subscriptions",
     "PlayerBase",
     "Definitions",
     "NetPacket",
@@ -2,7 +2,7 @@
 from abc import ABCMeta, abstractmethod
 from typing import Dict
 
-from replay_unpack.core.entity import Entity
+from replay_unpack.core.entity import Entity, Subscriptions
 
 
 class IBattleController(metaclass=ABCMeta):
@@ -36,5 +36,12 @@ class IBattleController(metaclass=ABCMeta):
     def map(self, value: str):
         pass
 
+    @property
+    def subscriptions(self) -> Subscriptions:
+        """
+        Callbacks of the entities created for this controller.
+        """
+        return Entity.default_subscriptions
+
     def get_info(self):
         pass
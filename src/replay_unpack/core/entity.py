@@ -1,13 +1,190 @@
-from typing import Callable, Dict, List, Tuple
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import logging
-from copy import copy
+import struct
 from enum import Enum
 from io import BytesIO
 
-from replay_unpack.core.entity_def import EntityDef, EntityFlags
+from replay_unpack.core.entity_def import EntityDef
+from replay_unpack.core.entity_def.base_definition import Property
+from replay_unpack.core.entity_def.constants import ALL_VOLATILES, VOLATILE_FLAGS
+
+
+class Subscriptions:
+    """
+    Callbacks of entity method calls and property changes. Every battle controller
+    has its own, so several replays can be played in one process at the same time.
+    """
+
+    def __init__(self):
+        self._methods: Dict[str, List[Callable]] = {}
+        self._properties: Dict[str, List[Callable]] = {}
+        # entity name -> dotted property path -> callbacks
+        self._nested_properties: Dict[str, Dict[str, List[Callable]]] = {}
+        # subscriptions resolved per entity type: indexed like its methods and client
+        # properties, nested ones as a trie of path segments
+        self._tables: Dict[EntityDef, Tuple[tuple, tuple, Optional[dict]]] = {}
+
+    def subscribe_method_call(
+        self, entity_name: str, method_name: str, func: Callable, replace: bool = False
+    ):
+        """
+        Add callbacks that should be triggered when given method called,
+        with replace instead of the ones added before
+        """
+        self._add(self._methods, entity_name + "_" + method_name, func, replace)
+
+    def subscribe_property_change(
+        self, entity_name: str, prop_name: str, func: Callable, replace: bool = False
+    ):
+        """
+        Add callbacks that should be triggered when given property changed,
+        with replace instead of the ones added before
+        """
+        self._add(self._properties, entity_name + "_" + prop_name, func, replace)
+
+    def subscribe_nested_property_change(
+        self, entity_name: str, prop_path: str, func: Callable, replace: bool = False
+    ):
+        """
+        Add callbacks that should be triggered when given dotted property path
+        or anything below it changed, with replace instead of the ones added before
+        """
+        self._add(self._nested_properties.setdefault(entity_name, {}), prop_path, func, replace)
+
+    def _add(self, subscriptions: Dict[str, List[Callable]], key: str, func: Callable, replace):
+        if replace:
+            subscriptions[key] = [func]
+        else:
+            subscriptions.setdefault(key, []).append(func)
+        self._tables.clear()
+
+    def get_tables(self, spec: EntityDef):
+        """
+        Subscriptions of an entity type by exposed method index and by client property index,
+        None where nothing is subscribed, and the trie of its nested property subscriptions.
+        """
+        tables = self._tables.get(spec)
+        if tables is None:
+            name = spec.get_name()
+            tables = self._tables[spec] = (
+                tuple(
+                    self._get_subscriptions(self._methods, name, method.get_name())
+                    for method in spec.exposed_client_methods()
+                ),
+                tuple(
+                    self._get_subscriptions(self._properties, name, prop.get_name())
+                    for prop in spec.client_properties()
+                ),
+                self._get_nested_subscriptions(name),
+            )
+        return tables
+
+    @staticmethod
+    def _get_subscriptions(
+        subscriptions: Dict[str, List[Callable]], entity_name: str, name: str
+    ) -> Optional[Tuple[Callable, ...]]:
+        return tuple(subscriptions.get(entity_name + "_" + name, ())) or None
+
+    def _get_nested_subscriptions(self, entity_name: str) -> Optional[Dict[Optional[str], Any]]:
+        """
+        Trie of nested property subscriptions keyed by path segments,
+        callbacks of a path are stored under None in its node.
+        """
+        subscriptions = self._nested_properties.get(entity_name)
+        if not subscriptions:
+            return None
+
+        root: Dict[Optional[str], Any] = {}
+        for prop_path, funcs in subscriptions.items():
+            node = root
+            for segment in prop_path.split("."):
+                node = node.setdefault(segment, {})
+            node[None] = tuple(funcs)
+        return root
+
+
+class _Encoded:
+    """
+    Encoded value of a property, as sliced out of the packet it arrived in.
+    """
+
+    __slots__ = ("prop", "data")
+
+    def __init__(self, prop: Property, data: bytes):
+        self.prop = prop
+        self.data = data
+
+    def __reduce__(self):
+        return _Encoded, (self.prop, self.data)
+
+    def decode(self):
+        return self.prop.create_from_stream(BytesIO(self.data))
+
+
+class LazyProperties(MutableMapping):
+    """
+    Property values by name. Values set encoded are decoded on first access,
+    so properties nobody reads are never decoded at all.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+
+    def set_encoded(self, name: str, prop: Property, data: bytes):
+        self._values[name] = _Encoded(prop, data)
+
+    def __getitem__(self, name: str):
+        value = self._values[name]
+        if type(value) is _Encoded:
+            value = self._values[name] = value.decode()
+        return value
+
+    def __setitem__(self, name: str, value):
+        self._values[name] = value
+
+    def __delitem__(self, name: str):
+        del self._values[name]
+
+    def __contains__(self, name):
+        return name in self._values
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+# volatiles of an entity are kept in one float array:
+# position at 0-2, yaw at 3, pitch at 4 and roll at 5
+_VOLATILE_DEFAULTS = array("d", bytes(6 * 8))
 
 
 class Entity:
+    __slots__ = (
+        "id",
+        "_spec",
+        "_methods",
+        "_method_subscriptions",
+        "_property_subscriptions",
+        "_nested_subscriptions",
+        "properties",
+        "_volatiles",
+        "_volatile_flags",
+        "client_properties",
+        "client_properties_internal",
+        "cell_properties",
+        "base_properties",
+        "_is_on_aoi",
+    )
+
     class Type(Enum):
         """
         Enum which represents all possible entity variations
@@ -17,50 +194,37 @@ class Entity:
         CELL = 2
         BASE = 4
 
-    _methods_subscriptions: Dict[str, List[Callable]] = {}
-    _properties_subscriptions: Dict[str, List[Callable]] = {}
-    _nested_properties_subscription = {}
+    # process-wide subscriptions of entities created without their own
+    default_subscriptions = Subscriptions()
 
-    def __init__(self, id_: int, spec: EntityDef):
+    def __init__(self, id_: int, spec: EntityDef, subscriptions: Optional[Subscriptions] = None):
         self.id = id_
         self._spec = spec
-        self._methods = spec.client().get_exposed_index_map()
+        self._methods = spec.exposed_client_methods()
+        if subscriptions is None:
+            subscriptions = Entity.default_subscriptions
+        methods, properties, nested = subscriptions.get_tables(spec)
+        self._method_subscriptions = methods
+        self._property_subscriptions = properties
+        self._nested_subscriptions = nested
 
         # we had to store properties values because network protocol
         # supports updating them partly (lists and dicts)
-        self.properties = {"client": {}, "cell": {}, "base": {}}
-
-        # position, yaw, pitch, roll
-        self.volatiles = copy(spec.volatiles())
-
-        self.client_properties = spec.properties().get_properties_by_flags(
-            EntityFlags.ALL_CLIENTS
-            | EntityFlags.BASE_AND_CLIENT
-            | EntityFlags.OTHER_CLIENTS
-            | EntityFlags.OWN_CLIENT
-            | EntityFlags.CELL_PUBLIC_AND_OWN
-            | EntityFlags.ALL_CLIENTS,
-            exposed_index=True,
-        )
-        self.client_properties_internal = spec.properties().get_properties_by_flags(
-            EntityFlags.ALL_CLIENTS
-            |
-            # not used for some reason
-            # EntityFlags.BASE_AND_CLIENT |
-            EntityFlags.OTHER_CLIENTS
-            | EntityFlags.OWN_CLIENT
-            | EntityFlags.CELL_PUBLIC_AND_OWN
-            | EntityFlags.ALL_CLIENTS
-        )
-        self.cell_properties = spec.properties().get_properties_by_flags(
-            EntityFlags.CELL_PUBLIC_AND_OWN
-            | EntityFlags.CELL_PUBLIC
-            # | EntityFlags.CELL_PRIVATE
-        )
-        self.base_properties = spec.properties().get_properties_by_flags(
-            # EntityFlags.BASE |
-            EntityFlags.BASE_AND_CLIENT
-        )
+        self.properties = {
+            "client": LazyProperties(),
+            "cell": LazyProperties(),
+            "base": LazyProperties(),
+        }
+
+        # position, yaw, pitch, roll, flags tell which of them the entity has
+        self._volatiles = _VOLATILE_DEFAULTS[:]
+        self._volatile_flags = spec.volatile_flags()
+
+        # index tables are shared by all entities of the same type
+        self.client_properties = spec.client_properties()
+        self.client_properties_internal = spec.client_properties_internal()
+        self.cell_properties = spec.cell_properties()
+        self.base_properties = spec.base_properties()
 
         self._is_on_aoi = True
 
@@ -75,34 +239,26 @@ class Entity:
     @classmethod
     def subscribe_method_call(cls, entity_name: str, method_name: str, func: Callable):
         """
-        Add callbacks that should be triggered when given method called
+        Set the callback in the process-wide subscriptions, replacing the one set before
+        so subscribing again for every replay does not pile them up.
+        Prefer Subscriptions of a controller.
         """
-        if method_name not in cls._methods_subscriptions:
-            cls._methods_subscriptions[entity_name + "_" + method_name] = []
-        cls._methods_subscriptions[entity_name + "_" + method_name].append(func)
+        cls.default_subscriptions.subscribe_method_call(entity_name, method_name, func, True)
 
     @classmethod
     def subscribe_property_change(cls, entity_name: str, prop_name: str, func: Callable):
         """
-        Add callbacks that should be triggered when given method called
+        Set the callback in the process-wide subscriptions, see subscribe_method_call.
         """
-        prop_hash = entity_name + "_" + prop_name
-        if prop_name not in cls._properties_subscriptions:
-            cls._properties_subscriptions[prop_hash] = []
-        cls._properties_subscriptions[prop_hash].append(func)
+        cls.default_subscriptions.subscribe_property_change(entity_name, prop_name, func, True)
 
     def call_client_method(self, exposed_index: int, payload: BytesIO):
-        method = self._methods[exposed_index]
-        logging.debug("calling %s method %s", self._spec.get_name(), method)
-        method_hash = self._spec.get_name() + "_" + method.get_name()
-        # print(method_hash)
-        subscriptions = Entity._methods_subscriptions.get(method_hash, [])
-        # if method.get_name() not in ["onCheckGamePing", "onCheckCellPing"]:
-        #     print(method_hash)
-        if not subscriptions:
+        subscriptions = self._method_subscriptions[exposed_index]
+        # arguments of methods nobody listens to are not decoded
+        if subscriptions is None:
             return
 
-        args, kwargs = method.create_from_stream(payload)
+        args, kwargs = self._methods[exposed_index].create_from_stream(payload)
         for func in subscriptions:
             try:
                 func(self, *args, **kwargs)
@@ -116,21 +272,23 @@ class Entity:
                 )
                 raise
 
-    def set_client_property(self, exposed_index, payload: BytesIO):
-        logging.debug(
-            "requested property %s of entity %s",
-            exposed_index,
-            self._spec.get_name(),
-        )
+    def set_client_property(self, exposed_index, payload: BytesIO, lazy: bool = False):
+        """
+        With lazy, variable-size values are kept encoded until they are accessed,
+        unless they are subscribed to.
+        """
         prop = self.client_properties[exposed_index]
-        logging.debug("setting %s client property %s", self._spec.get_name(), prop)
+        subscriptions = self._property_subscriptions[exposed_index]
+
+        # fixed-size values are cheaper to decode right away than to keep encoded
+        lazy = lazy and not prop.is_fixed_size and isinstance(payload, BytesIO)
+        if lazy and subscriptions is None and self._set_encoded("client", prop, payload):
+            return
 
         value = prop.create_from_stream(payload)
         self.properties["client"][prop.get_name()] = value
-        prop_hash = f"{self._spec.get_name()}_{prop.get_name()}"
-        subscriptions = Entity._properties_subscriptions.get(prop_hash, [])
 
-        if not subscriptions:
+        if subscriptions is None:
             return
         for func in subscriptions:
             try:
@@ -140,87 +298,137 @@ class Entity:
 
     @classmethod
     def subscribe_nested_property_change(cls, entity_name: str, prop_path: str, func: Callable):
-        prop_hash = entity_name + "_" + prop_path
-        if prop_path not in cls._nested_properties_subscription:
-            cls._nested_properties_subscription[prop_hash] = []
-        cls._nested_properties_subscription[prop_hash].append(func)
+        """
+        Set the callback in the process-wide subscriptions, see subscribe_method_call.
+        """
+        cls.default_subscriptions.subscribe_nested_property_change(
+            entity_name, prop_path, func, True
+        )
 
     def set_client_nested_property(self, prop_path: list, obj):
-        prop_hash = f"{self.get_name()}_{'.'.join(map(str, prop_path))}"
-
-        for phash, funcs in Entity._nested_properties_subscription.items():
-            if phash in prop_hash:
-                for func in funcs:
+        """
+        Notify subscribers of the changed path and of every path above it.
+        """
+        node = self._nested_subscriptions
+        for segment in prop_path:
+            if node is None:
+                return
+            node = node.get(str(segment))
+            if node is not None and None in node:
+                for func in node[None]:
                     func(self, obj)
 
-    def set_client_property_internal(self, internal_index, payload: BytesIO):
-        logging.debug(
-            "requested property %s of entity %s",
-            internal_index,
-            self._spec.get_name(),
-        )
+    def set_client_property_internal(self, internal_index, payload: BytesIO, lazy: bool = False):
         prop = self.client_properties_internal[internal_index]
-        logging.debug("setting %s client property %s", self._spec.get_name(), prop)
-        self.properties["client"][prop.get_name()] = prop.create_from_stream(payload)
+        self._set_property("client", prop, payload, lazy)
 
-    def set_cell_property(self, internal_index, payload: BytesIO):
+    def set_cell_property(self, internal_index, payload: BytesIO, lazy: bool = False):
         prop = self.cell_properties[internal_index]
-        logging.debug("setting %s cell property %s", self._spec.get_name(), prop)
-        self.properties["cell"][prop.get_name()] = prop.create_from_stream(payload)
+        self._set_property("cell", prop, payload, lazy)
 
-    def set_base_property(self, internal_index, payload: BytesIO):
+    def set_base_property(self, internal_index, payload: BytesIO, lazy: bool = False):
         prop = self.base_properties[internal_index]
-        logging.debug("setting %s base property %s", self._spec.get_name(), prop)
-        self.properties["base"][prop.get_name()] = prop.create_from_stream(payload)
+        self._set_property("base", prop, payload, lazy)
+
+    def _set_property(self, domain: str, prop: Property, payload: BytesIO, lazy: bool):
+        lazy = lazy and not prop.is_fixed_size and isinstance(payload, BytesIO)
+        if not (lazy and self._set_encoded(domain, prop, payload)):
+            self.properties[domain][prop.get_name()] = prop.create_from_stream(payload)
+
+    def _set_encoded(self, domain: str, prop: Property, payload: BytesIO) -> bool:
+        """
+        Slice the encoded value of the property out of the payload and move past it.
+        A value running past the end of a truncated payload is left to eager decoding,
+        which deals with it like it always did, and False is returned.
+        """
+        buffer = payload.getvalue()
+        start = payload.tell()
+        try:
+            end = prop.skip(buffer, start)
+        except (struct.error, IndexError):
+            return False
+        if end > len(buffer):
+            return False
+
+        payload.seek(end)
+        self.properties[domain].set_encoded(prop.get_name(), prop, buffer[start:end])
+        return True
 
     def get_name(self):
         return self._spec.get_name()
 
+    @property
+    def volatiles(self) -> Dict[str, Any]:
+        """
+        Snapshot of the volatiles the entity has.
+        """
+        return {
+            name: getattr(self, name)
+            for name, flag in VOLATILE_FLAGS.items()
+            if self._volatile_flags & flag
+        }
+
+    def set_volatiles(
+        self, position: Tuple[float, float, float], yaw: float, pitch: float, roll: float
+    ):
+        """
+        Update all volatiles at once, as position updates do.
+        """
+        volatiles = self._volatiles
+        volatiles[0], volatiles[1], volatiles[2] = position
+        volatiles[3] = yaw
+        volatiles[4] = pitch
+        volatiles[5] = roll
+        self._volatile_flags = ALL_VOLATILES
+
+    def _missing_volatile(self, name: str) -> RuntimeError:
+        return RuntimeError("Entity %s does not have volatile %s" % (self.get_name(), name))
+
     @property
     def position(self) -> Tuple[float, float, float]:
-        try:
-            return self.volatiles["position"]
-        except KeyError:
-            raise RuntimeError(
-                "Entity %s does not have volatile %s" % (self.get_name(), "position")
-            )
+        if not self._volatile_flags & 1:
+            raise self._missing_volatile("position")
+        volatiles = self._volatiles
+        return volatiles[0], volatiles[1], volatiles[2]
 
     @position.setter
     def position(self, value: Tuple[float, float, float]):
-        self.volatiles["position"] = value
+        volatiles = self._volatiles
+        volatiles[0], volatiles[1], volatiles[2] = value
+        self._volatile_flags |= 1
 
     @property
     def yaw(self) -> float:
-        try:
-            return self.volatiles["yaw"]
-        except KeyError:
-            raise RuntimeError("Entity %s does not have volatile %s" % (self.get_name(), "yaw"))
+        if not self._volatile_flags & 2:
+            raise self._missing_volatile("yaw")
+        return self._volatiles[3]
 
     @yaw.setter
     def yaw(self, value: float):
-        self.volatiles["yaw"] = value
+        self._volatiles[3] = value
+        self._volatile_flags |= 2
 
     @property
     def pitch(self) -> float:
-        try:
-            return self.volatiles["pitch"]
-        except KeyError:
-            raise RuntimeError("Entity %s does not have volatile %s" % (self.get_name(), "pitch"))
+        if not self._volatile_flags & 4:
+            raise self._missing_volatile("pitch")
+        return self._volatiles[4]
 
     @pitch.setter
     def pitch(self, value: float):
-        self.volatiles["pitch"] = value
+        self._volatiles[4] = value
+        self._volatile_flags |= 4
 
     @property
     def roll(self) -> float:
-        try:
-            return self.volatiles["roll"]
-        except KeyError:
-            raise RuntimeError("Entity %s does not have volatile %s" % (self.get_name(), "roll"))
+        if not self._volatile_flags & 8:
+            raise self._missing_volatile("roll")
+        return self._volatiles[5]
 
     @roll.setter
     def roll(self, value: float):
-        self.volatiles["roll"] = value
+        self._volatiles[5] = value
+        self._volatile_flags |= 8
 
     def __repr__(self):
         return "{}<{}>".format(self._spec.get_name(), self.id)
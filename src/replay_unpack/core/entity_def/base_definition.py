@@ -82,6 +82,7 @@ class Property:
         self._type = type_
         self._default = type_.get_default_value(default)  # type: ignore
         self._flags = getattr(EntityFlags, flags)
+        self.is_fixed_size: bool = type_.get_fixed_size() is not None
 
     def get_name(self):
         return self._name
@@ -112,6 +113,12 @@ class Property:
     def create_from_stream(self, stream: BytesIO):
         return self._type.create_from_stream(stream)
 
+    def skip(self, buffer: bytes, offset: int) -> int:
+        """
+        Offset right after the value encoded at the given offset, see DataType.skip.
+        """
+        return self._type.skip(buffer, offset)
+
     def __repr__(self):
         return "{name} ({args})".format(name=self._name, args=self._type)
 
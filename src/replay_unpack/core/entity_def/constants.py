@@ -19,6 +19,10 @@ class EntityFlags:
     EDITOR_ONLY = 128
 
 
+# flags of the volatiles an entity has, position counts as one
+VOLATILE_FLAGS = {"position": 1, "yaw": 2, "pitch": 4, "roll": 8}
+ALL_VOLATILES = 15
+
 ALIASES_FILE: str = "scripts/entity_defs/alias.xml"
 
 # entities constants
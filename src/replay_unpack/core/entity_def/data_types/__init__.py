@@ -53,11 +53,19 @@ class Alias:
         "USER_TYPE": UserType,  # almost the same
     }
 
-    def __init__(self, base_dir: str):
+    def __init__(self, base_dir: str, typed_arrays: bool = False):
+        # decode arrays of fixed-size elements into typed columns, see PyTypedArray
+        self.typed_arrays = typed_arrays
         self._mapping: Dict[str, DataType] = {}
         self._alias: Dict[str, etree.ElementBase] = {}
         self._initialize(base_dir)
 
+    def __getstate__(self):
+        # alias sections are only needed while parsing definitions
+        state = self.__dict__.copy()
+        state["_alias"] = {}
+        return state
+
     def get_data_type_from_section(self, section: etree.ElementBase, header_size=1) -> DataType:
         type_name = section.text.strip()
 
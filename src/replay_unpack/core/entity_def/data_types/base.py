@@ -1,9 +1,13 @@
 # coding=utf-8
 import logging
+import struct
 from io import BytesIO
+from typing import Optional
 
 from lxml import etree
 
+from .decoder import DecoderBuilder, Index, compile_decoder
+
 
 class DataType:
     DEFAULT_VALUE = None
@@ -12,6 +16,10 @@ class DataType:
     def __init__(self, header_size=1):
         self._nullable = False
         self._header_size = header_size
+        # compiled decoders by header size, built on first use
+        self._decoders = {}
+        # encoded size of fixed-size values, -1 until computed
+        self._fixed_size: Optional[int] = -1
 
         assert self.get_size_in_bytes() is not None, (
             "You must define DATA_SIZE variable "
@@ -31,12 +39,39 @@ class DataType:
         logging.debug("Parsing default value for %s", self.__class__.__name__)
         return self._get_default_value_from_section(default)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_decoders"] = {}
+        return state
+
     def create_from_stream(self, stream: BytesIO, header_size: int = 1):
-        return self._get_value_from_stream(stream, header_size)
+        if not isinstance(stream, BytesIO):
+            return self._get_value_from_stream(stream, header_size)
+
+        decoder = self._decoders.get(header_size)
+        if decoder is None:
+            decoder = self._decoders[header_size] = compile_decoder(self, header_size)
+        return decoder(stream)
 
     def _get_value_from_stream(self, stream: BytesIO, header_size: int):
         raise NotImplementedError()
 
+    def skip(self, buffer: bytes, offset: int, header_size: int = 1) -> int:
+        """
+        Offset right after the value encoded at the given offset of the buffer,
+        found without decoding the value.
+        """
+        size = self.get_fixed_size()
+        if size is not None:
+            return offset + size
+        return self._skip(buffer, offset, header_size)
+
+    def _skip(self, buffer: bytes, offset: int, header_size: int) -> int:
+        stream = BytesIO(buffer)
+        stream.seek(offset)
+        self._get_value_from_stream(stream, header_size)
+        return stream.tell()
+
     def write_to_stream(self, stream: BytesIO):
         raise RuntimeError("Not supported for now")
 
@@ -46,5 +81,40 @@ class DataType:
     def get_size_in_bytes(self):
         return self._DATA_SIZE
 
+    def get_fixed_size(self) -> Optional[int]:
+        """
+        Encoded size in bytes when it is the same for all values, otherwise None.
+        """
+        if self._fixed_size == -1:
+            fmt = self.get_struct_format()
+            self._fixed_size = None if fmt is None else struct.calcsize("<" + fmt)
+        return self._fixed_size
+
+    def get_struct_format(self) -> Optional[str]:
+        """
+        Struct format of the binary layout without byte order, one character per
+        unpacked value. None when the size is not fixed.
+        """
+        return None
+
+    def _emit_decoder(self, builder: DecoderBuilder, target: str):
+        """
+        Emit code decoding a value at offset o of buffer b into the target variable.
+        """
+        fmt = self.get_struct_format()
+        if fmt is None:
+            builder.emit_fallback(self, target)
+            return
+
+        values = builder.emit_unpack(fmt)
+        builder.emit(f"{target} = {self._emit_from_values(builder, values, 0)}")
+
+    def _emit_from_values(self, builder: DecoderBuilder, values: str, start: Index) -> str:
+        """
+        Emit code building a value from an unpacked tuple, starting at the given index.
+        Returns an expression of the value. Only used when get_struct_format is not None.
+        """
+        raise NotImplementedError
+
     def __repr__(self):
         return "<{}>".format(self.__class__.__name__)
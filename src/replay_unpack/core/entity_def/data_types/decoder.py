@@ -0,0 +1,185 @@
+# coding=utf-8
+"""
+Compiler of DataType trees into decoders, plain functions that decode a value
+from a BytesIO stream and leave the stream after it.
+
+Fixed-size layouts are read and unpacked at once with a precompiled little-endian
+struct. Everything else works on the underlying buffer and an offset: every
+DataType emits straight-line code for itself, consecutive fixed-size fields are
+still unpacked with a single struct and anything without code generation falls
+back to _get_value_from_stream.
+"""
+import struct
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .nested_types import PyFixedDict, PyFixedList, PyTypedArray
+
+Index = Union[int, str]
+
+
+def add(start: Index, count: int) -> Index:
+    """
+    Offset an index that is either known at compile time or a variable name.
+    """
+    if isinstance(start, int):
+        return start + count
+    return f"{start} + {count}" if count else start
+
+
+class DecoderBuilder:
+    def __init__(self, header_size: int):
+        self.header_size = header_size
+
+        self._lines: List[str] = []
+        self._indent = 1
+        self._namespace: Dict[str, Any] = {
+            "BytesIO": BytesIO,
+            "PyFixedDict": PyFixedDict,
+            "PyFixedList": PyFixedList,
+            "PyTypedArray": PyTypedArray,
+            "Struct": struct.Struct,
+        }
+        self._counter = 0
+
+    def var(self, prefix: str = "v") -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def const(self, value: Any, prefix: str = "c") -> str:
+        name = self.var(prefix)
+        self._namespace[name] = value
+        return name
+
+    def emit(self, line: str):
+        self._lines.append("    " * self._indent + line)
+
+    def indent(self) -> "_Block":
+        return _Block(self)
+
+    def emit_unpack(self, fmt: str) -> str:
+        """
+        Unpack a fixed layout at the current offset, returns the tuple variable.
+        """
+        layout = struct.Struct("<" + fmt)
+        values = self.var("t")
+        self.emit(f"{values} = {self.const(layout, 's')}.unpack_from(b, o)")
+        self.emit(f"o += {layout.size}")
+        return values
+
+    def emit_read(self, fmt: str) -> str:
+        """
+        Read and unpack a fixed layout directly from the stream, returns the tuple variable.
+        """
+        layout = struct.Struct("<" + fmt)
+        values = self.var("t")
+        self.emit(f"{values} = {self.const(layout, 's')}.unpack(stream.read({layout.size}))")
+        return values
+
+    def emit_fallback(self, data_type, target: str):
+        stream = self.var("stream")
+        self.emit(f"{stream} = BytesIO(b)")
+        self.emit(f"{stream}.seek(o)")
+        self.emit(
+            f"{target} = {self.const(data_type, 'type')}"
+            f"._get_value_from_stream({stream}, {self.header_size})"
+        )
+        self.emit(f"o = {stream}.tell()")
+
+    def emit_fields(self, fields: Sequence[Tuple[Any, Any]], store: Callable[[Any, str], str]):
+        """
+        Decode fields in order, collapsing runs of fixed-size fields into one unpack.
+        store formats the statement that keeps a decoded value under its key.
+        """
+        run: List[Tuple[Any, Any, str]] = []
+
+        def flush():
+            if not run:
+                return
+            values = self.emit_unpack("".join(fmt for _, _, fmt in run))
+            start = 0
+            for key, data_type, fmt in run:
+                self.emit(store(key, data_type._emit_from_values(self, values, start)))
+                start += len(fmt)
+            run.clear()
+
+        for key, data_type in fields:
+            fmt = data_type.get_struct_format()
+            if fmt is not None:
+                run.append((key, data_type, fmt))
+                continue
+
+            flush()
+            value = self.var()
+            data_type._emit_decoder(self, value)
+            self.emit(store(key, value))
+        flush()
+
+    def build(self, result: str, name: str, buffered: bool) -> Callable:
+        if buffered:
+            # b and o are the buffer and offset the emitted code works with
+            prologue = ["    b = stream.getvalue()", "    o = stream.tell()"]
+            self.emit("stream.seek(min(o, len(b)))")
+        else:
+            prologue = []
+
+        lines = ["def decode(stream):", *prologue, *self._lines, f"    return {result}", ""]
+        source = "\n".join(lines)
+        namespace = dict(self._namespace)
+        exec(compile(source, f"<decoder {name}>", "exec"), namespace)
+        return namespace["decode"]
+
+
+class _Block:
+    def __init__(self, builder: DecoderBuilder):
+        self._builder = builder
+
+    def __enter__(self):
+        self._builder._indent += 1
+
+    def __exit__(self, *exc_info):
+        self._builder._indent -= 1
+
+
+def compile_decoder(data_type, header_size: int) -> Callable:
+    """
+    Compile a decoder of a DataType tree.
+    """
+    builder = DecoderBuilder(header_size)
+
+    fmt = data_type.get_struct_format()
+    if fmt is not None:
+        values = builder.emit_read(fmt)
+        value = data_type._emit_from_values(builder, values, 0)
+        return builder.build(value, data_type.__class__.__name__, buffered=False)
+
+    value = builder.var()
+    data_type._emit_decoder(builder, value)
+    return builder.build(value, data_type.__class__.__name__, buffered=True)
+
+
+def compile_arguments_decoder(
+    arguments: Sequence[Tuple[Optional[str], Any]], header_size: int, name: str
+) -> Callable:
+    """
+    Compile a decoder of method arguments returning (args, kwargs),
+    unnamed arguments go to args and named ones to kwargs.
+    """
+    builder = DecoderBuilder(header_size)
+    builder.emit("args = []")
+    builder.emit("kwargs = {}")
+
+    def store(key, value):
+        return f"args.append({value})" if key is None else f"kwargs[{key!r}] = {value}"
+
+    formats = [data_type.get_struct_format() for _, data_type in arguments]
+    if None not in formats:
+        values = builder.emit_read("".join(formats))  # type: ignore
+        start = 0
+        for (key, data_type), fmt in zip(arguments, formats):
+            builder.emit(store(key, data_type._emit_from_values(builder, values, start)))
+            start += len(fmt)  # type: ignore
+        return builder.build("args, kwargs", name, buffered=False)
+
+    builder.emit_fields(arguments, store)
+    return builder.build("args, kwargs", name, buffered=True)
@@ -5,6 +5,7 @@ from io import BytesIO
 from lxml.etree import _Element
 
 from .base import DataType
+from .decoder import add
 
 
 class _MathType(DataType):
@@ -19,6 +20,12 @@ class _MathType(DataType):
         x = tuple(struct.unpack(self.STRUCT_TYPE, stream.read(self._DATA_SIZE)))
         return x
 
+    def get_struct_format(self):
+        return self.STRUCT_TYPE
+
+    def _emit_from_values(self, builder, values, start):
+        return f"{values}[{start}:{add(start, len(self.STRUCT_TYPE))}]"
+
     def _get_default_value_from_section(self, value: _Element):
         raise RuntimeError(
             f"_get_default_value_from_section for {self.__class__.__name__} is not defined"
@@ -3,6 +3,11 @@
 Dirty hack to simplify nested property and slices
 Override list and dict types to store information about types
 """
+import array
+import struct
+import sys
+from collections.abc import MutableSequence
+from itertools import chain
 
 
 class PyFixedDict(dict):
@@ -10,15 +15,18 @@ class PyFixedDict(dict):
     Emulate BigWorld type PyFixedDict
     """
 
-    def __init__(self, attributes, *args, **kwargs):
-        self._attributes = attributes
+    __slots__ = ("_type",)
+
+    def __init__(self, fixed_dict_type, *args, **kwargs):
+        # FixedDict data type, its field tables are shared by all of its values
+        self._type = fixed_dict_type
         super(PyFixedDict, self).__init__(*args, **kwargs)
 
     def get_field_name_for_index(self, index):
-        return list(self._attributes.keys())[index]
+        return self._type.field_names[index]
 
     def get_field_type_for_index(self, index):
-        return list(self._attributes.values())[index]
+        return self._type.field_types[index]
 
 
 class PyFixedList(list):
@@ -37,3 +45,236 @@ class PyFixedList(list):
 
     def get_element_type(self):
         return self._element_type
+
+
+class TypedLayout:
+    """
+    Layout of the elements of a PyTypedArray: the name, typecode and width of each
+    element field, vectors have a width above one. Structs decoding a number of
+    elements at once are cached per element count.
+    """
+
+    def __init__(self, element_type, attributes, fields):
+        self.element_type = element_type
+        # attributes of fixed dict elements, None for numeric and vector elements
+        self.attributes = attributes
+        self.fields = fields
+        self.element_format = "".join(code * width for _, code, width in fields)
+        self.stride = len(self.element_format)
+        self._structs = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_structs"] = {}
+        return state
+
+    def get_struct(self, count: int) -> struct.Struct:
+        layout = self._structs.get(count)
+        if layout is None:
+            layout = self._structs[count] = struct.Struct("<" + self.element_format * count)
+        return layout
+
+
+class PyTypedArray(MutableSequence):
+    """
+    Array of fixed-size elements stored as typed columns, one array.array per
+    field of the element. Elements are materialized on access: numerics as numbers,
+    vectors as tuples and fixed dicts as PyFixedDict, which are kept so changes
+    made to them stick. Elements set to None, which nested property updates do to
+    clear an element, are kept as a set of indices and read as zeros in the columns.
+    """
+
+    __slots__ = (
+        "_layout",
+        "_element_type",
+        "_attributes",
+        "_fields",
+        "_columns",
+        "_rows",
+        "_nones",
+    )
+
+    def __init__(self, layout: TypedLayout, columns):
+        self._layout = layout
+        self._element_type = layout.element_type
+        self._attributes = layout.attributes
+        self._fields = layout.fields
+        self._columns = columns
+        self._rows = {}
+        self._nones = set()
+
+    @classmethod
+    def frombytes(cls, layout: TypedLayout, data: bytes, count: int):
+        """
+        Decode count consecutive little-endian elements at once.
+        """
+        fields = layout.fields
+        if len(fields) == 1:
+            column = array.array(fields[0][1])
+            if len(data) != count * layout.stride * column.itemsize:
+                raise struct.error(f"unpack requires a buffer of {count} elements")
+            column.frombytes(data)
+            if sys.byteorder == "big":
+                column.byteswap()
+            return cls(layout, [column])
+
+        values = layout.get_struct(count).unpack(data)
+        stride = layout.stride
+        columns = []
+        position = 0
+        for _, code, width in fields:
+            if width == 1:
+                columns.append(array.array(code, values[position::stride]))
+            else:
+                parts = (values[position + i :: stride] for i in range(width))
+                columns.append(array.array(code, chain.from_iterable(zip(*parts))))
+            position += width
+        return cls(layout, columns)
+
+    def column(self, name=None) -> array.array:
+        """
+        Get the values of a field of all elements, vectors are flattened.
+        The column is shared with the array and must not be modified.
+        Elements that are None are zeros.
+        """
+        self._sync()
+        if name is None:
+            return self._columns[0]
+        for (field, _, _), column in zip(self._fields, self._columns):
+            if field == name:
+                return column
+        raise KeyError(name)
+
+    def get_field_name_for_index(self, index):
+        return index
+
+    def get_element_type(self):
+        return self._element_type
+
+    def __len__(self):
+        return len(self._columns[0]) // self._fields[0][2]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        return self._get(self._normalize(index))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._set_slice(index, list(value))
+            return
+
+        index = self._normalize(index)
+        self._rows.pop(index, None)
+        if value is None:
+            self._nones.add(index)
+        else:
+            self._nones.discard(index)
+        for (_, code, width), column, field_value in zip(
+            self._fields, self._columns, self._split(value)
+        ):
+            if width == 1:
+                column[index] = field_value
+            else:
+                column[index * width : (index + 1) * width] = array.array(code, field_value)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            self._set_slice(index, [])
+        else:
+            index = self._normalize(index)
+            self._set_slice(slice(index, index + 1), [])
+
+    def insert(self, index, value):
+        index = min(max(index + len(self) if index < 0 else index, 0), len(self))
+        self._set_slice(slice(index, index), [value])
+
+    def __iter__(self):
+        if self._attributes is not None or self._nones:
+            return (self._get(i) for i in range(len(self)))
+
+        column = self._columns[0]
+        width = self._fields[0][2]
+        if width == 1:
+            return iter(column)
+        return zip(*(column[i::width] for i in range(width)))
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, PyTypedArray)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def _normalize(self, index):
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("array index out of range")
+        return index
+
+    def _get(self, index):
+        if index in self._nones:
+            return None
+
+        if self._attributes is None:
+            width = self._fields[0][2]
+            if width == 1:
+                return self._columns[0][index]
+            return tuple(self._columns[0][index * width : (index + 1) * width])
+
+        row = self._rows.get(index)
+        if row is None:
+            row = self._rows[index] = PyFixedDict(self._element_type)
+            for (name, _, width), column in zip(self._fields, self._columns):
+                if width == 1:
+                    row[name] = column[index]
+                else:
+                    row[name] = tuple(column[index * width : (index + 1) * width])
+        return row
+
+    def _split(self, value):
+        if value is None:
+            return tuple(0 if width == 1 else (0,) * width for _, _, width in self._fields)
+        if self._attributes is None:
+            return (value,)
+        return tuple(value[name] for name, _, _ in self._fields)
+
+    def _sync(self):
+        """
+        Write materialized rows back to the columns.
+        """
+        rows, self._rows = self._rows, {}
+        for index, row in rows.items():
+            self[index] = row
+
+    def _set_slice(self, index: slice, values):
+        self._sync()
+        start, stop, step = index.indices(len(self))
+        if step != 1:  # extended slices are rare, go through a list
+            items = list(self)
+            items[index] = values
+            start, stop, values = 0, len(self), items
+            self._rows = {}
+        stop = max(start, stop)
+
+        # indices after the slice move by the change in length
+        shift = len(values) - (stop - start)
+        self._nones = {
+            index if index < start else index + shift
+            for index in self._nones
+            if index < start or index >= stop
+        }
+        self._nones.update(start + i for i, value in enumerate(values) if value is None)
+
+        for position, ((_, code, width), column) in enumerate(zip(self._fields, self._columns)):
+            replacement = array.array(code)
+            for value in values:
+                field_value = self._split(value)[position]
+                if width == 1:
+                    replacement.append(field_value)
+                else:
+                    replacement.extend(field_value)
+            column[start * width : stop * width] = replacement
@@ -22,6 +22,12 @@ class _NumericType(DataType):
         assert self.STRUCT_TYPE is not None, "STRUCT_TYPE undefined while unpacking from stream"
         return struct.unpack(self.STRUCT_TYPE, stream.read(self._DATA_SIZE))[0]
 
+    def get_struct_format(self):
+        return self.STRUCT_TYPE
+
+    def _emit_from_values(self, builder, values, start):
+        return f"{values}[{start}]"
+
     def _get_default_value_from_section(self, section: etree.ElementBase):
         assert self.PYTHON_TYPE is not None, "PYTHON_TYPE undefined while getting default value"
         return self.PYTHON_TYPE(section.text.strip())
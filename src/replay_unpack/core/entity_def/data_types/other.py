@@ -1,15 +1,17 @@
 # coding=utf-8
 from collections import OrderedDict
 from io import BytesIO
-from struct import unpack
-from typing import Iterable, Dict, Optional
+from struct import Struct, unpack
+from typing import Iterable, Dict, Optional, Tuple
 
 from lxml import etree
 
 from .base import DataType
 from .constants import INFINITY
-from .nested_types import PyFixedDict, PyFixedList
-from .numeric import UInt8
+from .decoder import add
+from .math import _MathType
+from .nested_types import PyFixedDict, PyFixedList, PyTypedArray, TypedLayout
+from .numeric import UInt8, _NumericType
 
 
 class _DataType(DataType):
@@ -23,6 +25,34 @@ class _DataType(DataType):
         )
 
 
+# size of long byte strings, followed by an unused byte
+LONG_SIZE = Struct("<HB")
+
+
+def _emit_sized_bytes(builder, target: str):
+    """
+    Emit reading of a size prefixed byte string, see Blob._get_value_from_stream.
+    """
+    size = builder.var("size")
+    builder.emit(f"{size} = b[o]")
+    builder.emit(f"if {size} == 0xFF:")
+    with builder.indent():
+        builder.emit(f"{size} = {builder.const(LONG_SIZE, 's')}.unpack_from(b, o + 1)[0]")
+        builder.emit("o += 4")
+    builder.emit("else:")
+    with builder.indent():
+        builder.emit("o += 1")
+    builder.emit(f"{target} = b[o:o + {size}]")
+    builder.emit(f"o += {size}")
+
+
+def _skip_sized_bytes(buffer: bytes, offset: int) -> int:
+    size = buffer[offset]
+    if size == 0xFF:
+        return offset + LONG_SIZE.size + 1 + LONG_SIZE.unpack_from(buffer, offset + 1)[0]
+    return offset + 1 + size
+
+
 class Blob(_DataType):
     """
     BLOB
@@ -45,6 +75,12 @@ class Blob(_DataType):
             return stream.read(size)
         return stream.read(size)
 
+    def _emit_decoder(self, builder, target):
+        _emit_sized_bytes(builder, target)
+
+    def _skip(self, buffer, offset, header_size):
+        return _skip_sized_bytes(buffer, offset)
+
 
 class String(_DataType):
     """
@@ -73,6 +109,18 @@ class String(_DataType):
             # probably this is a pickle string or smtg like that
             return _str
 
+    def _emit_decoder(self, builder, target):
+        _emit_sized_bytes(builder, target)
+        builder.emit("try:")
+        with builder.indent():
+            builder.emit(f"{target} = {target}.decode('utf-8')")
+        builder.emit("except UnicodeDecodeError:")
+        with builder.indent():
+            builder.emit("pass")
+
+    def _skip(self, buffer, offset, header_size):
+        return _skip_sized_bytes(buffer, offset)
+
     def _get_default_value_from_section(self, section: etree.ElementBase):
         assert isinstance(section.text, str)
         return section.text
@@ -93,11 +141,23 @@ class Python(_DataType):
         (size,) = unpack("B", stream.read(1))
         return stream.read(size)
 
+    def _emit_decoder(self, builder, target):
+        size = builder.var("size")
+        builder.emit(f"{size} = b[o]")
+        builder.emit(f"{target} = b[o + 1:o + 1 + {size}]")
+        builder.emit(f"o += 1 + {size}")
+
+    def _skip(self, buffer, offset, header_size):
+        return offset + 1 + buffer[offset]
+
 
 class FixedDict(_DataType):
     def __init__(self, attributes: Dict[str, DataType], allow_none=False, header_size=1):
         self.allow_none = allow_none
         self.attributes = attributes
+        # fields by index for nested property updates
+        self.field_names: Tuple[str, ...] = tuple(attributes)
+        self.field_types: Tuple[DataType, ...] = tuple(attributes.values())
         super(FixedDict, self).__init__(header_size=header_size)
 
     def _get_value_from_stream(self, stream: BytesIO, header_size: int):
@@ -116,11 +176,64 @@ class FixedDict(_DataType):
             else:
                 stream.seek(stream_pos)
 
-        kw = PyFixedDict(self.attributes)
-        for key, _type in self.attributes.items():
+        kw = PyFixedDict(self)
+        for key, _type in zip(self.field_names, self.field_types):
             kw[key] = _type.create_from_stream(stream, header_size=header_size)
         return kw
 
+    def get_struct_format(self):
+        if self.allow_none or not self.attributes:
+            return None
+
+        formats = [value.get_struct_format() for value in self.attributes.values()]
+        if None in formats:
+            return None
+        return "".join(formats)  # type: ignore
+
+    def _emit_decoder(self, builder, target):
+        if not self.allow_none:
+            self._emit_fields(builder, target)
+            return
+
+        flag = builder.var("flag")
+        builder.emit(f"{flag} = b[o:o + 1]")
+        builder.emit(f"if {flag} == b'\\x00':")
+        with builder.indent():
+            builder.emit("o += 1")
+            builder.emit(f"{target} = None")
+        builder.emit("else:")
+        with builder.indent():
+            builder.emit(f"if {flag} == b'\\x01':")
+            with builder.indent():
+                builder.emit("o += 1")
+            self._emit_fields(builder, target)
+
+    def _skip(self, buffer, offset, header_size):
+        if self.allow_none:
+            flag = buffer[offset : offset + 1]
+            if flag == b"\x00":
+                return offset + 1
+            if flag == b"\x01":
+                offset += 1
+
+        for value in self.field_types:
+            offset = value.skip(buffer, offset, header_size)
+        return offset
+
+    def _emit_fields(self, builder, target):
+        builder.emit(f"{target} = PyFixedDict({builder.const(self, 'fixed_dict')})")
+        builder.emit_fields(
+            list(self.attributes.items()), lambda key, value: f"{target}[{key!r}] = {value}"
+        )
+
+    def _emit_from_values(self, builder, values, start):
+        target = builder.var()
+        builder.emit(f"{target} = PyFixedDict({builder.const(self, 'fixed_dict')})")
+        for key, value in self.attributes.items():
+            builder.emit(f"{target}[{key!r}] = {value._emit_from_values(builder, values, start)}")
+            start = add(start, len(value.get_struct_format()))
+        return target
+
     @classmethod
     def from_section(cls, alias, section: etree.ElementBase, header_size=1):
         attributes = OrderedDict()
@@ -153,12 +266,39 @@ class Array(_DataType):
         array_size: Optional[int] = None,
         allow_none: bool = False,
         header_size=1,
+        typed: bool = False,
     ):
         self.allow_none: bool = allow_none
         self.array_size: Optional[int] = array_size
         self.type = _type
+        # with typed set, arrays of fixed-size elements decode into PyTypedArray
+        self.typed_layout = self._get_typed_layout() if typed else None
         super(Array, self).__init__(header_size=header_size)
 
+    def _get_typed_layout(self) -> Optional[TypedLayout]:
+        """
+        Layout of the element fields for typed columns,
+        None when elements are not numerics, vectors or flat fixed dicts of them.
+        """
+        if isinstance(self.type, FixedDict):
+            if self.type.allow_none or not self.type.attributes:
+                return None
+            attributes = self.type.attributes
+            items = list(attributes.items())
+        else:
+            attributes = None
+            items = [(None, self.type)]
+
+        fields = []
+        for name, value in items:
+            if isinstance(value, _NumericType):
+                fields.append((name, value.STRUCT_TYPE, 1))
+            elif isinstance(value, _MathType):
+                fields.append((name, "f", len(value.STRUCT_TYPE)))
+            else:
+                return None
+        return TypedLayout(self.type, attributes, tuple(fields))
+
     def _get_value_from_stream(self, stream: BytesIO, header_size: int):
         result = PyFixedList(self.type)
 
@@ -169,10 +309,97 @@ class Array(_DataType):
         else:
             size = self.array_size
 
+        if self.typed_layout is not None:
+            data = stream.read(size * self.type.get_size_in_bytes())
+            return PyTypedArray.frombytes(self.typed_layout, data, size)
+
         for _ in range(size):
             result.append(self.type.create_from_stream(stream, header_size=header_size))
         return result
 
+    def get_struct_format(self):
+        if self.array_size is None or self.typed_layout is not None:
+            return None
+
+        fmt = self.type.get_struct_format()
+        if not fmt:
+            return None
+        return fmt * self.array_size
+
+    def _emit_decoder(self, builder, target):
+        if self.array_size is not None:
+            if self.get_struct_format() is not None:
+                super()._emit_decoder(builder, target)
+                return
+            count = str(self.array_size)
+        else:
+            count = builder.var("count")
+            builder.emit(f"{count} = b[o]")
+            builder.emit("o += 1")
+
+        if self.typed_layout is not None:
+            size = f"{count} * {self.type.get_size_in_bytes()}"
+            layout = builder.const(self.typed_layout, "layout")
+            builder.emit(f"{target} = PyTypedArray.frombytes({layout}, b[o:o + {size}], {count})")
+            builder.emit(f"o += {size}")
+            return
+
+        fmt = self.type.get_struct_format()
+        if not fmt:
+            builder.emit(f"{target} = PyFixedList({builder.const(self.type, 'type')})")
+            builder.emit(f"for _ in range({count}):")
+            with builder.indent():
+                value = builder.var()
+                self.type._emit_decoder(builder, value)
+                builder.emit(f"{target}.append({value})")
+            return
+
+        # unpack all elements at once, structs are cached per element count
+        layouts = builder.const({}, "layouts")
+        layout = builder.var("layout")
+        builder.emit(f"{layout} = {layouts}.get({count})")
+        builder.emit(f"if {layout} is None:")
+        with builder.indent():
+            builder.emit(f"{layout} = {layouts}[{count}] = Struct('<' + {fmt!r} * {count})")
+        values = builder.var("t")
+        builder.emit(f"{values} = {layout}.unpack_from(b, o)")
+        builder.emit(f"o += {layout}.size")
+        self._emit_elements(builder, target, values, 0, f"len({values})")
+
+    def _skip(self, buffer, offset, header_size):
+        if self.array_size is None:
+            count = buffer[offset]
+            offset += 1
+        else:
+            count = self.array_size
+
+        size = self.type.get_fixed_size()
+        if size is not None:
+            return offset + count * size
+        for _ in range(count):
+            offset = self.type.skip(buffer, offset, header_size)
+        return offset
+
+    def _emit_from_values(self, builder, values, start):
+        target = builder.var()
+        size = len(self.type.get_struct_format()) * self.array_size
+        self._emit_elements(builder, target, values, start, add(start, size))
+        return target
+
+    def _emit_elements(self, builder, target, values, start, stop):
+        fmt = self.type.get_struct_format()
+        element_type = builder.const(self.type, "type")
+
+        if len(fmt) == 1 and isinstance(self.type, _NumericType):
+            builder.emit(f"{target} = PyFixedList({element_type}, {values}[{start}:{stop}])")
+            return
+
+        index = builder.var("i")
+        builder.emit(f"{target} = PyFixedList({element_type})")
+        builder.emit(f"for {index} in range({start}, {stop}, {len(fmt)}):")
+        with builder.indent():
+            builder.emit(f"{target}.append({self.type._emit_from_values(builder, values, index)})")
+
     @classmethod
     def from_section(cls, alias, section: etree.ElementBase, header_size):
         child_type = alias.get_data_type_from_section(section.find("of", namespaces=None))
@@ -183,7 +410,13 @@ class Array(_DataType):
             array_size = int(size_section.text.strip())
         else:
             array_size = None
-        return cls(child_type, array_size=array_size, allow_none=allow_none, header_size=1)
+        return cls(
+            child_type,
+            array_size=array_size,
+            allow_none=allow_none,
+            header_size=1,
+            typed=alias.typed_arrays,
+        )
 
     def get_size_in_bytes(self):
         if self.array_size is not None:
@@ -228,6 +461,16 @@ class UserType(_DataType):
             stream.read(header_size)
         return self.type.create_from_stream(stream, header_size=header_size)
 
+    def _emit_decoder(self, builder, target):
+        if not isinstance(self.type, Blob):
+            builder.emit(f"o += {builder.header_size}")
+        self.type._emit_decoder(builder, target)
+
+    def _skip(self, buffer, offset, header_size):
+        if not isinstance(self.type, Blob):
+            offset += header_size
+        return self.type.skip(buffer, offset, header_size)
+
     @classmethod
     def from_section(cls, alias, section: etree.ElementBase, header_size):
         type_section = section.find("Type", namespaces=None)
@@ -247,5 +490,11 @@ class Mailbox(_DataType):
     def _get_value_from_stream(self, stream: BytesIO, header_size: int):
         pass
 
+    def _emit_decoder(self, builder, target):
+        builder.emit(f"{target} = None")
+
+    def _skip(self, buffer, offset, header_size):
+        return offset
+
     def __repr__(self):
         return "<Mailbox>".format()
@@ -1,6 +1,9 @@
 # coding=utf-8
+import gc
+import hashlib
 import os
-from typing import Dict
+import pickle
+from typing import Dict, Optional
 
 from lxml import etree
 
@@ -8,15 +11,42 @@ from .constants import ENTITIES_DEFS_PATH
 from .data_types import Alias
 from .entity_description import EntityDef
 
+# bump when the bundle layout changes in a way the fingerprint does not catch
+BUNDLE_FORMAT = 1
+
+
+def get_fingerprint(base_dir: str) -> str:
+    """
+    Fingerprint the definition sources of a version and the code that parses them,
+    by path, size and modification time of every file.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for directory in (os.path.join(base_dir, "scripts"), os.path.dirname(__file__)):
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith((".pyc", ".pyo")):
+                    continue
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                digest.update(
+                    f"{os.path.relpath(path, directory)}:{stat.st_size}:{stat.st_mtime_ns};".encode()
+                )
+    return digest.hexdigest()
+
 
 class Definitions:
-    def __init__(self, base_dir):
-        self._alias = Alias(base_dir)
+    def __init__(self, base_dir, typed_arrays: bool = False):
+        self._alias = Alias(base_dir, typed_arrays)
 
         self._entity_defs_by_name: Dict[str, EntityDef] = {}
         self._entity_defs_by_index: Dict[int, EntityDef] = {}
         self._parse(base_dir)
 
+    @property
+    def typed_arrays(self) -> bool:
+        return self._alias.typed_arrays
+
     def get_entity_def_by_name(self, name):
         return self._entity_defs_by_name[name]
 
@@ -24,6 +54,39 @@ class Definitions:
         # bigworld counts entities from 1
         return self._entity_defs_by_index[index - 1]
 
+    def save_bundle(self, path: str, base_dir: str):
+        """
+        Store parsed definitions as a precompiled bundle, which loads without any XML.
+        """
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as fp:
+            pickle.dump(
+                (BUNDLE_FORMAT, get_fingerprint(base_dir), self), fp, pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load_bundle(cls, path: str, base_dir: str) -> Optional["Definitions"]:
+        """
+        Load definitions from a bundle built by save_bundle, None if the bundle is
+        missing or does not match the current sources. Bundles are trusted input.
+        """
+        # thousands of small objects are created at once, collecting in between is wasted
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, "rb") as fp:
+                bundle_format, fingerprint, definitions = pickle.load(fp)
+        except Exception:  # missing, unreadable or built by incompatible code
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        if bundle_format != BUNDLE_FORMAT or fingerprint != get_fingerprint(base_dir):
+            return None
+        return definitions
+
     def _parse_entities(self, base_dir: str, entities: etree.ElementBase):
         for index, entity_section in enumerate(entities.iterchildren(tag=None)):
             path = os.path.join(base_dir, ENTITIES_DEFS_PATH, entity_section.tag + ".def")
@@ -4,11 +4,38 @@ from typing import List, Dict, Tuple
 
 from lxml import etree
 
-from .base_definition import BaseDataObjectDef
+from .base_definition import BaseDataObjectDef, Property
+from .constants import EntityFlags, VOLATILE_FLAGS
 from .data_types import DataType, Alias, INFINITY
+from .data_types.decoder import compile_arguments_decoder
 
 DEFAULT_HEADER_SIZE = 1
 
+CLIENT_PROPERTIES_FLAGS = (
+    EntityFlags.ALL_CLIENTS
+    | EntityFlags.BASE_AND_CLIENT
+    | EntityFlags.OTHER_CLIENTS
+    | EntityFlags.OWN_CLIENT
+    | EntityFlags.CELL_PUBLIC_AND_OWN
+)
+CLIENT_PROPERTIES_INTERNAL_FLAGS = (
+    EntityFlags.ALL_CLIENTS
+    # not used for some reason
+    # | EntityFlags.BASE_AND_CLIENT
+    | EntityFlags.OTHER_CLIENTS
+    | EntityFlags.OWN_CLIENT
+    | EntityFlags.CELL_PUBLIC_AND_OWN
+)
+CELL_PROPERTIES_FLAGS = (
+    EntityFlags.CELL_PUBLIC_AND_OWN
+    | EntityFlags.CELL_PUBLIC
+    # | EntityFlags.CELL_PRIVATE
+)
+BASE_PROPERTIES_FLAGS = (
+    # EntityFlags.BASE |
+    EntityFlags.BASE_AND_CLIENT
+)
+
 
 class MethodArgument:
     def __init__(self, type_: DataType, name=None):
@@ -28,6 +55,12 @@ class EntityMethod:
         self._name = name
         self._arguments = arguments
         self._variable_header_size = header_size
+        self._decoder = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_decoder"] = None
+        return state
 
     def get_name(self):
         return self._name
@@ -73,6 +106,15 @@ class EntityMethod:
         return cls(section.tag, list(args), header_size)
 
     def create_from_stream(self, stream: BytesIO) -> Tuple[List, Dict[str, object]]:
+        if isinstance(stream, BytesIO):
+            if self._decoder is None:
+                self._decoder = compile_arguments_decoder(
+                    [(arg.name, arg.type) for arg in self._arguments],
+                    self._variable_header_size,
+                    self._name,
+                )
+            return self._decoder(stream)
+
         unpacked_args = []
         unpacked_kwargs = {}
         for arg in self._arguments:
@@ -124,6 +166,7 @@ class EntityDef(BaseDataObjectDef):
         super().__init__(base_dir, alias)
 
         self._parse_section(section)
+        self._build_index_tables()
 
     def get_name(self):
         return self._name
@@ -143,6 +186,41 @@ class EntityDef(BaseDataObjectDef):
     def volatiles(self):
         return self._volatile
 
+    def volatile_flags(self) -> int:
+        return self._volatile_flags
+
+    def client_properties(self) -> Tuple[Property, ...]:
+        return self._client_properties
+
+    def client_properties_internal(self) -> Tuple[Property, ...]:
+        return self._client_properties_internal
+
+    def cell_properties(self) -> Tuple[Property, ...]:
+        return self._cell_properties
+
+    def base_properties(self) -> Tuple[Property, ...]:
+        return self._base_properties
+
+    def exposed_client_methods(self) -> Tuple[EntityMethod, ...]:
+        return self._exposed_client_methods
+
+    def _build_index_tables(self):
+        """
+        Property and method tables in network index order, computed once
+        and shared by all entities of this type.
+        """
+        properties = self._properties
+        self._client_properties = tuple(
+            properties.get_properties_by_flags(CLIENT_PROPERTIES_FLAGS, exposed_index=True)
+        )
+        self._client_properties_internal = tuple(
+            properties.get_properties_by_flags(CLIENT_PROPERTIES_INTERNAL_FLAGS)
+        )
+        self._cell_properties = tuple(properties.get_properties_by_flags(CELL_PROPERTIES_FLAGS))
+        self._base_properties = tuple(properties.get_properties_by_flags(BASE_PROPERTIES_FLAGS))
+        self._exposed_client_methods = tuple(self._client_methods.get_exposed_index_map())
+        self._volatile_flags = sum(VOLATILE_FLAGS[name] for name in self._volatile)
+
     def _parse_cell_methods(self, section: etree.ElementBase):
         if section is None:
             return
@@ -0,0 +1,216 @@
+# coding=utf-8
+"""
+Checkpoints of a player between two packets, to resume playing a packet stream
+from the middle instead of from its start.
+
+The state of a player is pickled, but definitions are shared by all players of a
+version and too large to store with every checkpoint. Objects reachable from the
+definitions are stored as references by their position in a walk of the definitions,
+which is the same in every process that loads definitions of the same version.
+
+Checkpoints may come from files next to replays, so unpickling only resolves the
+classes a player state is made of, plus methods of those objects for the callbacks
+the state holds.
+"""
+import array
+import collections
+import inspect
+import io
+import pickle
+import struct
+import weakref
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+from packaging.version import Version
+
+# magic, format version, checkpoint count, payload hash
+SIDECAR_HEADER = struct.Struct("<4sHI20s")
+SIDECAR_MAGIC = b"WRCP"
+SIDECAR_VERSION = 1
+# time, offset, compressed state size
+CHECKPOINT_HEADER = struct.Struct("<dQI")
+
+SHARED_MODULE = "replay_unpack.core.entity_def"
+# globals any state may refer to besides the classes of the player
+SAFE_GLOBALS = (
+    array.array,
+    array._array_reconstructor,  # type: ignore
+    collections.OrderedDict,
+    collections.defaultdict,
+    frozenset,
+    set,
+    Version,
+)
+
+_shared_tables: "weakref.WeakKeyDictionary[Any, List[Any]]" = weakref.WeakKeyDictionary()
+
+
+class Checkpoint:
+    """
+    State of a player after all packets before offset were played, time is the time
+    of the first packet that was not.
+    """
+
+    __slots__ = ("time", "offset", "state")
+
+    def __init__(self, time: float, offset: int, state: bytes):
+        self.time = time
+        self.offset = offset
+        self.state = state
+
+    def __repr__(self):
+        return "Checkpoint<{:.1f}s @ {}, {} bytes>".format(self.time, self.offset, len(self.state))
+
+
+def get_shared_objects(definitions) -> List[Any]:
+    """
+    Definition objects and the containers holding them in a deterministic walk order.
+    Caches of definitions only hold other things, so playing does not change the walk.
+    """
+    table = _shared_tables.get(definitions)
+    if table is not None:
+        return table
+
+    table = []
+    seen = set()
+    stack = [definitions]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+
+        if isinstance(obj, (list, tuple)):
+            children = list(obj)
+        elif isinstance(obj, dict):
+            children = [item for pair in obj.items() for item in pair]
+        elif type(obj).__module__.startswith(SHARED_MODULE):
+            if hasattr(obj, "__dict__"):
+                children = list(vars(obj).values())
+            else:
+                children = [getattr(obj, name) for name in _get_slots(type(obj))]
+        else:
+            continue
+
+        seen.add(id(obj))
+        table.append(obj)
+        stack.extend(reversed(children))
+
+    _shared_tables[definitions] = table
+    return table
+
+
+def _get_slots(cls) -> List[str]:
+    return [
+        name
+        for klass in cls.__mro__
+        for name in getattr(klass, "__slots__", ())
+        if name != "__weakref__"
+    ]
+
+
+class _StatePickler(pickle.Pickler):
+    def __init__(self, file, shared: Dict[int, int]):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._shared = shared
+
+    def persistent_id(self, obj):
+        return self._shared.get(id(obj))
+
+
+class _StateUnpickler(pickle.Unpickler):
+    def __init__(self, file, shared: List[Any], classes: Iterable[type]):
+        super().__init__(file)
+        self._shared = shared
+        self._globals = {
+            (item.__module__, item.__qualname__): item for item in (*SAFE_GLOBALS, *classes)
+        }
+        self._classes = tuple(classes)
+
+    def persistent_load(self, pid):
+        return self._shared[pid]
+
+    def find_class(self, module: str, name: str):
+        # bound methods are pickled as getattr(obj, name)
+        if module == "builtins" and name == "getattr":
+            return self._get_method
+
+        item = self._globals.get((module, name))
+        if item is None:
+            raise pickle.UnpicklingError("global '%s.%s' is forbidden" % (module, name))
+        return item
+
+    def _get_method(self, obj, name: str):
+        if type(obj) not in self._classes or name.startswith("__"):
+            raise pickle.UnpicklingError(
+                "method '%s.%s' is forbidden" % (type(obj).__qualname__, name)
+            )
+
+        method = getattr(obj, name)
+        if not inspect.ismethod(method) or method.__self__ is not obj:
+            raise pickle.UnpicklingError("'%s.%s' is not a method" % (type(obj).__qualname__, name))
+        return method
+
+
+def dump_state(obj, shared: List[Any]) -> bytes:
+    """
+    Pickle obj, storing the shared objects as references.
+    """
+    buffer = io.BytesIO()
+    _StatePickler(buffer, {id(item): index for index, item in enumerate(shared)}).dump(
+        (len(shared), obj)
+    )
+    return buffer.getvalue()
+
+
+def load_state(data: bytes, shared: List[Any], classes: Iterable[type]):
+    """
+    Unpickle a state dumped by dump_state against the same shared objects.
+    Only the given classes and SAFE_GLOBALS can be instantiated.
+    """
+    count, obj = _StateUnpickler(io.BytesIO(data), shared, classes).load()
+    if count != len(shared):
+        raise ValueError("Checkpoint was made with different definitions")
+    return obj
+
+
+def save_checkpoints(path: str, key: str, checkpoints: List[Checkpoint]):
+    """
+    Persist checkpoints, key identifies the replay payload they were made from.
+    States are compressed, they are mostly repeated names and small integers.
+    """
+    with open(path, "wb") as fp:
+        fp.write(
+            SIDECAR_HEADER.pack(
+                SIDECAR_MAGIC, SIDECAR_VERSION, len(checkpoints), bytes.fromhex(key)
+            )
+        )
+        for checkpoint in checkpoints:
+            state = zlib.compress(checkpoint.state, 1)
+            fp.write(CHECKPOINT_HEADER.pack(checkpoint.time, checkpoint.offset, len(state)))
+            fp.write(state)
+
+
+def load_checkpoints(path: str, key: str) -> Optional[List[Checkpoint]]:
+    """
+    Load persisted checkpoints, None if they are missing, unreadable or stale.
+    """
+    checkpoints = []
+    try:
+        with open(path, "rb") as fp:
+            magic, version, count, stored_key = SIDECAR_HEADER.unpack(fp.read(SIDECAR_HEADER.size))
+            if (magic, version) != (SIDECAR_MAGIC, SIDECAR_VERSION):
+                return None
+            if stored_key != bytes.fromhex(key):
+                return None
+
+            for _ in range(count):
+                time, offset, size = CHECKPOINT_HEADER.unpack(fp.read(CHECKPOINT_HEADER.size))
+                state = fp.read(size)
+                if len(state) != size:
+                    return None
+                checkpoints.append(Checkpoint(time, offset, zlib.decompress(state)))
+    except (OSError, struct.error, zlib.error):
+        return None
+
+    return checkpoints
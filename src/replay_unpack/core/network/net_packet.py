@@ -1,19 +1,101 @@
 # coding=utf-8
+import mmap
+import os
 import struct
-from io import BytesIO
+from typing import Iterable, Iterator, Union
+
+HEADER = struct.Struct("IIf")
+
+
+class PacketReader(object):
+    """
+    Reader over the payload of a single packet. It only keeps offsets into the
+    buffer shared by all packets of a chunk, so framing does not copy payloads.
+    Offsets passed to and returned by tell/seek are relative to the payload.
+    """
+
+    __slots__ = ("_buffer", "_start", "_position", "_end")
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], start: int = 0, end: int = -1):
+        self._buffer = buffer
+        self._start = start
+        self._position = start
+        self._end = len(buffer) if end < 0 else end
+
+    def read(self, size: int = -1) -> bytes:
+        start = self._position
+        if size < 0 or start + size > self._end:
+            self._position = self._end
+        else:
+            self._position = start + size
+        return self._buffer[start : self._position]
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        values = fmt.unpack_from(self._buffer, self._position)
+        self._position += fmt.size
+        if self._position > self._end:
+            raise struct.error(f"unpack requires {fmt.size} bytes within the packet")
+        return values
+
+    def tell(self) -> int:
+        return self._position - self._start
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position - self._start
+        elif whence == os.SEEK_END:
+            offset += self._end - self._start
+        self._position = self._start + min(max(offset, 0), self._end - self._start)
+        return self._position - self._start
+
+    def __len__(self):
+        return self._end - self._start
 
 
 class NetPacket(object):
     __slots__ = ("size", "type", "time", "raw_data")
 
-    def __init__(self, stream):
-        (self.size,) = struct.unpack("I", stream.read(4))
-        (self.type,) = struct.unpack("I", stream.read(4))
-        (self.time,) = struct.unpack("f", stream.read(4))
-
-        self.raw_data = BytesIO(stream.read(self.size))
+    def __init__(self, size: int, type_: int, time: float, raw_data: PacketReader):
+        self.size = size
+        self.type = type_
+        self.time = time
+        self.raw_data = raw_data
 
     def __repr__(self):
         return "TIME: {} TYPE: {} SIZE: {} DATA: {}".format(
             self.time, hex(self.type), self.size, self.raw_data
         )
+
+
+def iter_packets(chunks: Iterable[Union[bytes, mmap.mmap]]) -> Iterator[NetPacket]:
+    """
+    Frame packets from a decompressed packet stream that arrives in chunks.
+    Headers are unpacked in place and payloads are handed out as readers over
+    the chunk, packets spanning a chunk boundary are held back until the rest
+    arrives. Chunks that do not slice into bytes are converted up front.
+    """
+    unpack_from = HEADER.unpack_from
+    header_size = HEADER.size
+    buffer = b""
+
+    for chunk in chunks:
+        if isinstance(chunk, (bytearray, memoryview)):
+            chunk = bytes(chunk)
+
+        buffer = buffer + chunk if buffer else chunk
+        end = len(buffer)
+        offset = 0
+
+        while end - offset >= header_size:
+            size, type_, time = unpack_from(buffer, offset)
+            start = offset + header_size
+            if start + size > end:
+                break
+
+            offset = start + size
+            yield NetPacket(size, type_, time, PacketReader(buffer, start, offset))
+
+        buffer = buffer[offset:]
+
+    if buffer:
+        raise ValueError("Packet stream ended with a truncated packet")
@@ -0,0 +1,157 @@
+# coding=utf-8
+import array
+import mmap
+import struct
+import sys
+from collections import Counter
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+from .net_packet import HEADER, NetPacket, PacketReader
+
+# magic, format version, packet count, raw stream size, payload hash
+SIDECAR_HEADER = struct.Struct("<4sHIQ20s")
+SIDECAR_MAGIC = b"WRPI"
+SIDECAR_VERSION = 1
+
+
+class PacketIndex:
+    """
+    Table of contents of a decompressed packet stream. For every packet it keeps
+    the offset of its header, its payload size, its type and its time in compact
+    array columns, which lets callers jump straight to the packets they need.
+    """
+
+    COLUMNS = (("offsets", "Q"), ("sizes", "I"), ("types", "I"), ("times", "f"))
+    # offsets follow from the sizes and are not persisted
+    PERSISTED_COLUMNS = COLUMNS[1:]
+
+    def __init__(
+        self,
+        raw_size: int,
+        offsets: array.array,
+        sizes: array.array,
+        types: array.array,
+        times: array.array,
+    ):
+        self.raw_size = raw_size
+        self.offsets = offsets
+        self.sizes = sizes
+        self.types = types
+        self.times = times
+
+    @classmethod
+    def build(cls, raw: Union[bytes, mmap.mmap]) -> "PacketIndex":
+        offsets = array.array("Q")
+        sizes = array.array("I")
+        types = array.array("I")
+        times = array.array("f")
+
+        unpack_from = HEADER.unpack_from
+        header_size = HEADER.size
+        offset = 0
+        end = len(raw)
+
+        while end - offset >= header_size:
+            size, type_, time = unpack_from(raw, offset)
+            if offset + header_size + size > end:
+                break
+
+            offsets.append(offset)
+            sizes.append(size)
+            types.append(type_)
+            times.append(time)
+            offset += header_size + size
+
+        if offset != end:
+            raise ValueError("Packet stream ended with a truncated packet")
+
+        return cls(end, offsets, sizes, types, times)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get_counts(self) -> Dict[int, int]:
+        """
+        Number of packets per packet type.
+        """
+        return dict(Counter(self.types))
+
+    def get_volumes(self) -> Dict[int, int]:
+        """
+        Payload bytes per packet type.
+        """
+        volumes: Dict[int, int] = {}
+        for type_, size in zip(self.types, self.sizes):
+            volumes[type_] = volumes.get(type_, 0) + size
+        return volumes
+
+    def find(self, types: Iterable[int]) -> Iterator[int]:
+        """
+        Positions of the packets with one of the given types, in stream order.
+        """
+        wanted = set(types)
+        return (i for i, type_ in enumerate(self.types) if type_ in wanted)
+
+    def iter_packets(
+        self, raw: Union[bytes, mmap.mmap], types: Iterable[int]
+    ) -> Iterator[NetPacket]:
+        """
+        Yield the packets with one of the given types without framing the rest.
+        """
+        assert len(raw) == self.raw_size, "Index does not belong to this packet stream"
+
+        for i in self.find(types):
+            start = self.offsets[i] + HEADER.size
+            end = start + self.sizes[i]
+            yield NetPacket(
+                self.sizes[i], self.types[i], self.times[i], PacketReader(raw, start, end)
+            )
+
+    def save(self, path: str, key: str):
+        """
+        Persist the index, key identifies the replay payload it was built from.
+        """
+        with open(path, "wb") as fp:
+            fp.write(
+                SIDECAR_HEADER.pack(
+                    SIDECAR_MAGIC, SIDECAR_VERSION, len(self), self.raw_size, bytes.fromhex(key)
+                )
+            )
+            for name, _ in self.PERSISTED_COLUMNS:
+                column = getattr(self, name)
+                if sys.byteorder == "big":
+                    column = array.array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(fp)
+
+    @classmethod
+    def load(cls, path: str, key: str) -> Optional["PacketIndex"]:
+        """
+        Load a persisted index, None if it is missing, unreadable or stale.
+        """
+        try:
+            with open(path, "rb") as fp:
+                magic, version, count, raw_size, stored_key = SIDECAR_HEADER.unpack(
+                    fp.read(SIDECAR_HEADER.size)
+                )
+                if (magic, version) != (SIDECAR_MAGIC, SIDECAR_VERSION):
+                    return None
+                if stored_key != bytes.fromhex(key):
+                    return None
+
+                columns = []
+                for _, typecode in cls.PERSISTED_COLUMNS:
+                    column = array.array(typecode)
+                    column.fromfile(fp, count)
+                    if sys.byteorder == "big":
+                        column.byteswap()
+                    columns.append(column)
+        except (OSError, EOFError, struct.error):
+            return None
+
+        sizes = columns[0]
+        offsets = array.array("Q", accumulate((size + HEADER.size for size in sizes), initial=0))
+        offsets.pop()
+
+        return cls(raw_size, offsets, *columns)
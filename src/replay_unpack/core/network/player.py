@@ -1,12 +1,16 @@
 #!/usr/bin/python
 # coding=utf-8
 import logging
+import mmap
 from abc import ABC
-from io import BytesIO
+from typing import Any, Callable, Iterable, List, Optional, Union
 
 from packaging.version import Version
 
-from .net_packet import NetPacket
+from ..entity import Entity, LazyProperties, Subscriptions, _Encoded
+from ..entity_def.data_types.nested_types import PyFixedDict, PyFixedList, PyTypedArray
+from .checkpoint import Checkpoint, dump_state, get_shared_objects, load_state
+from .net_packet import HEADER, NetPacket, iter_packets
 
 
 class PlayerBase:
@@ -15,6 +19,8 @@ class PlayerBase:
 
         self._definitions = self._get_definitions()
         self._mapping = self._get_packets_mapping()
+        # whether the last play stopped on a condition before the end of the stream
+        self.stopped = False
 
     def _get_definitions(self):
         raise NotImplementedError
@@ -35,12 +41,54 @@ class PlayerBase:
     def _process_packet(self, packet, t: float):
         raise NotImplementedError
 
-    def play(self, replay_data, strict_mode=False):
-        io = BytesIO(replay_data)
-        while io.tell() != len(replay_data):
-            packet = NetPacket(io)
+    def _dispatch_packet(self, packet: NetPacket):
+        self._process_packet(self._deserialize_packet(packet), packet.time)
+
+    def play(
+        self,
+        replay_data: Union[bytes, memoryview, mmap.mmap, Iterable[bytes]],
+        strict_mode=False,
+        end: Optional[float] = None,
+        offset: int = 0,
+        checkpoint_interval: Optional[float] = None,
+        max_packets: Optional[int] = None,
+        stop: Optional[Callable[[], bool]] = None,
+    ) -> List[Checkpoint]:
+        """
+        Play the decompressed packet stream, given either in full
+        or as an iterable of consecutive chunks.
+        Playing starts at offset, which has to be the start of a packet in a stream
+        given in full. It stops before the first packet after end, after max_packets
+        packets or once stop returns True after a packet, and no further chunks
+        are taken from the stream then. Whether it did is kept in stopped.
+        With checkpoint_interval, a checkpoint is taken before the first packet
+        of every interval of that many seconds, they are returned.
+        """
+        if isinstance(replay_data, (bytes, bytearray, memoryview, mmap.mmap)):
+            if offset:
+                replay_data = memoryview(replay_data)[offset:]
+            replay_data = (replay_data,)
+        elif offset:
+            raise ValueError("Only streams given in full can be played from an offset")
+
+        checkpoints: List[Checkpoint] = []
+        next_checkpoint = 0.0
+
+        self.stopped = False
+        for count, packet in enumerate(iter_packets(replay_data)):
+            if (end is not None and packet.time > end) or (
+                max_packets is not None and count >= max_packets
+            ):
+                self.stopped = True
+                break
+
+            if checkpoint_interval is not None and packet.time >= next_checkpoint:
+                checkpoints.append(self.save_checkpoint(packet.time, offset))
+                next_checkpoint = (packet.time // checkpoint_interval + 1) * checkpoint_interval
+            offset += HEADER.size + packet.size
+
             try:
-                self._process_packet(self._deserialize_packet(packet), packet.time)
+                self._dispatch_packet(packet)
             except Exception:
                 logging.exception(
                     "Problem with packet %s:%s:%s",
@@ -51,6 +99,49 @@ class PlayerBase:
                 if strict_mode:
                     raise
 
+            if stop is not None and stop():
+                self.stopped = True
+                break
+
+        return checkpoints
+
+    def _get_shared_objects(self) -> List[Any]:
+        """
+        Objects that checkpoints refer to instead of storing them,
+        the same in every player of this version.
+        """
+        return get_shared_objects(self._definitions)
+
+    def _get_checkpoint_classes(self) -> List[type]:
+        """
+        Classes the state of the player is made of, the only ones a checkpoint can create.
+        """
+        return [
+            type(self),
+            Entity,
+            LazyProperties,
+            Subscriptions,
+            _Encoded,
+            PyFixedDict,
+            PyFixedList,
+            PyTypedArray,
+            *self._mapping.values(),
+        ]
+
+    def save_checkpoint(self, time: float, offset: int) -> Checkpoint:
+        """
+        Checkpoint of the player, offset is where playing continues in the packet stream.
+        """
+        return Checkpoint(time, offset, dump_state(self, self._get_shared_objects()))
+
+    def restore_checkpoint(self, checkpoint: Checkpoint) -> "PlayerBase":
+        """
+        Player in the state of the checkpoint, sharing the definitions of this one.
+        """
+        return load_state(
+            checkpoint.state, self._get_shared_objects(), self._get_checkpoint_classes()
+        )
+
 
 class ControlledPlayerBase(PlayerBase, ABC):
     def __init__(self, version: Version, period: float):
@@ -59,8 +150,15 @@ class ControlledPlayerBase(PlayerBase, ABC):
         self.period = period
         self._battle_controller = self._get_controller()
 
+    @property
+    def battle_controller(self):
+        return self._battle_controller
+
     def _get_controller(self):
         raise NotImplementedError
 
+    def _get_checkpoint_classes(self) -> List[type]:
+        return [type(self._battle_controller), *super()._get_checkpoint_classes()]
+
     def get_info(self):
         return self._battle_controller.get_info()
@@ -1,9 +1,11 @@
 from .binary_stream import BinaryStream
 from .matrix_4 import Matrix4
+from .record import Record
 from .vector_3 import Vector3
 
 __all__ = [
     "BinaryStream",
     "Matrix4",
+    "Record",
     "Vector3",
 ]
@@ -0,0 +1,102 @@
+# coding=utf-8
+"""
+Declarative layouts of packets and network types that start with fixed-size fields.
+
+A Record subclass lists its fields once in FIELDS as (name, format) pairs, where the
+format is a struct format of a single value or another Record class. The fields are
+read with one precompiled little-endian struct and assigned by generated code,
+instances only get slots for their fields and whatever __slots__ the class adds.
+"""
+import struct
+from typing import Any, Dict, List, Tuple, Type, Union
+
+from replay_unpack.core.pretty_print_mixin import PrettyPrintObjectMixin
+
+from ..net_packet import PacketReader
+
+Field = Tuple[str, Union[str, Type["Record"]]]
+
+
+class RecordMeta(type):
+    def __new__(mcs, name, bases, namespace):
+        fields = namespace.get("FIELDS", ())
+        namespace["__slots__"] = tuple(field for field, _ in fields) + tuple(
+            namespace.get("__slots__", ())
+        )
+        cls = super().__new__(mcs, name, bases, namespace)
+        if fields:
+            cls._compile()
+        return cls
+
+
+class Record(PrettyPrintObjectMixin, metaclass=RecordMeta):
+    FIELDS: Tuple[Field, ...] = ()
+
+    _layout: struct.Struct
+    _assign: Any
+
+    def __init__(self, stream):
+        layout = self._layout
+        if isinstance(stream, PacketReader):
+            values = stream.unpack(layout)
+        else:
+            values = layout.unpack(stream.read(layout.size))
+        self._assign(values)
+
+    @classmethod
+    def from_values(cls, values: tuple) -> "Record":
+        """
+        Build a record from already unpacked values, in the order of its layout.
+        """
+        record = cls.__new__(cls)
+        record._assign(values)
+        return record
+
+    @classmethod
+    def get_format(cls) -> str:
+        """
+        Struct format of the fields without byte order.
+        """
+        return "".join(fmt if isinstance(fmt, str) else fmt.get_format() for _, fmt in cls.FIELDS)
+
+    @classmethod
+    def get_size(cls) -> int:
+        return cls._layout.size
+
+    @classmethod
+    def get_offset(cls, name: str) -> int:
+        """
+        Byte offset of a field from the start of the record.
+        """
+        fmt = "<"
+        for field, field_fmt in cls.FIELDS:
+            if field == name:
+                return struct.calcsize(fmt)
+            fmt += field_fmt if isinstance(field_fmt, str) else field_fmt.get_format()
+        raise KeyError(name)
+
+    @classmethod
+    def _compile(cls):
+        lines: List[str] = []
+        namespace: Dict[str, Any] = {}
+
+        def emit(record_cls, target: str, start: int) -> int:
+            for field, fmt in record_cls.FIELDS:
+                if isinstance(fmt, str):
+                    lines.append(f"    {target}.{field} = values[{start}]")
+                    start += 1
+                    continue
+
+                name = f"r{len(namespace)}"
+                namespace[f"{name}_cls"] = fmt
+                lines.append(f"    {name} = {name}_cls.__new__({name}_cls)")
+                start = emit(fmt, name, start)
+                lines.append(f"    {target}.{field} = {name}")
+            return start
+
+        emit(cls, "self", 0)
+        source = "\n".join(["def _assign(self, values):", *lines, ""])
+        exec(compile(source, f"<record {cls.__name__}>", "exec"), namespace)
+
+        cls._layout = struct.Struct("<" + cls.get_format())
+        cls._assign = namespace["_assign"]
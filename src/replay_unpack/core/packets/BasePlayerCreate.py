@@ -1,11 +1,8 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import BinaryStream, Record
 
-from replay_unpack.core import PrettyPrintObjectMixin
-from replay_unpack.core.network.types import BinaryStream
 
-
-class BasePlayerCreate(PrettyPrintObjectMixin):
+class BasePlayerCreate(Record):
     """
     This method is called to create a new player as far as required to
     talk to the base entity. Only data shared between the base and the
@@ -13,8 +10,9 @@ class BasePlayerCreate(PrettyPrintObjectMixin):
     onCellPlayerCreate later if the player is put on the cell also.
     """
 
-    def __init__(self, stream):
-        (self.entityId,) = struct.unpack("i", stream.read(4))
-        (self.entityType,) = struct.unpack("h", stream.read(2))
+    FIELDS = (("entityId", "i"), ("entityType", "h"))
+    __slots__ = ("value",)
 
+    def __init__(self, stream):
+        super().__init__(stream)
         self.value = BinaryStream(stream)
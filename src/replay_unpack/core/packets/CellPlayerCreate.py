@@ -1,18 +1,18 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import BinaryStream, Record, Vector3
 
-from replay_unpack.core import PrettyPrintObjectMixin
-from replay_unpack.core.network.types import BinaryStream
-from replay_unpack.core.network.types import Vector3
 
+class CellPlayerCreate(Record):
+    FIELDS = (
+        ("entityId", "i"),
+        ("spaceId", "i"),
+        ("unknown", "h"),
+        ("vehicleId", "i"),
+        ("position", Vector3),
+        ("direction", Vector3),
+    )
+    __slots__ = ("value",)
 
-class CellPlayerCreate(PrettyPrintObjectMixin):
     def __init__(self, stream):
-        (self.entityId,) = struct.unpack("i", stream.read(4))
-        (self.spaceId,) = struct.unpack("i", stream.read(4))
-        (self.unknown,) = struct.unpack("h", stream.read(2))
-        (self.vehicleId,) = struct.unpack("i", stream.read(4))
-        self.position = Vector3(stream)
-        self.direction = Vector3(stream)
-
+        super().__init__(stream)
         self.value = BinaryStream(stream)
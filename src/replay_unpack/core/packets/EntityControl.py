@@ -1,9 +1,6 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import Record
 
-from replay_unpack.core import PrettyPrintObjectMixin
 
-
-class EntityControl(PrettyPrintObjectMixin):
-    def __init__(self, stream):
-        self.entityId, self.isControled = struct.unpack("ib", stream.read(5))
+class EntityControl(Record):
+    FIELDS = (("entityId", "i"), ("isControled", "b"))
@@ -1,20 +1,19 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import BinaryStream, Record, Vector3
 
-from replay_unpack.core import PrettyPrintObjectMixin
-from replay_unpack.core.network.types import BinaryStream
-from replay_unpack.core.network.types import Vector3
 
+class EntityCreate(Record):
+    FIELDS = (
+        ("entityID", "i"),
+        ("type", "h"),
+        ("vehicleId", "i"),
+        ("spaceId", "i"),
+        ("position", Vector3),
+        ("direction", Vector3),
+        ("unknown1", "i"),
+    )
+    __slots__ = ("state",)
 
-class EntityCreate(PrettyPrintObjectMixin):
     def __init__(self, stream):
-        (self.entityID,) = struct.unpack("i", stream.read(4))
-        (self.type,) = struct.unpack("h", stream.read(2))
-        (self.vehicleId,) = struct.unpack("i", stream.read(4))
-        (self.spaceId,) = struct.unpack("i", stream.read(4))
-        self.position = Vector3(stream)
-        self.direction = Vector3(stream)
-
-        (self.unknown1,) = struct.unpack("i", stream.read(4))
-
+        super().__init__(stream)
         self.state = BinaryStream(stream)
@@ -1,14 +1,11 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import Record
 
-from replay_unpack.core import PrettyPrintObjectMixin
 
-
-class EntityEnter(PrettyPrintObjectMixin):
+class EntityEnter(Record):
     """
     Fires when entity enters AOI and starts
     receiving updates from server
     """
 
-    def __init__(self, stream):
-        self.entityId, self.spaceId, self.vehicleID = struct.unpack("iii", stream.read(12))
+    FIELDS = (("entityId", "i"), ("spaceId", "i"), ("vehicleID", "i"))
@@ -1,14 +1,11 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import Record
 
-from replay_unpack.core import PrettyPrintObjectMixin
 
-
-class EntityLeave(PrettyPrintObjectMixin):
+class EntityLeave(Record):
     """
     Fires when entity leaves AOI and stops
     receiving updates from server
     """
 
-    def __init__(self, stream):
-        (self.entityId,) = struct.unpack("i", stream.read(4))
+    FIELDS = (("entityId", "i"),)
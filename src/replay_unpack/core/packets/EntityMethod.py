@@ -1,18 +1,16 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import BinaryStream, Record
 
-from replay_unpack.core import PrettyPrintObjectMixin
-from replay_unpack.core.network.types import BinaryStream
 
-
-class EntityMethod(PrettyPrintObjectMixin):
+class EntityMethod(Record):
     """
     Fires when servers requests client to call
     entity's method with some arguments
     """
 
-    def __init__(self, stream):
-        (self.entityId,) = struct.unpack("I", stream.read(4))
-        (self.messageId,) = struct.unpack("I", stream.read(4))
+    FIELDS = (("entityId", "I"), ("messageId", "I"))
+    __slots__ = ("data",)
 
+    def __init__(self, stream):
+        super().__init__(stream)
         self.data = BinaryStream(stream)
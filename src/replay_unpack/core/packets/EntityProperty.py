@@ -1,17 +1,16 @@
 # coding=utf-8
-import struct
+from replay_unpack.core.network.types import BinaryStream, Record
 
-from replay_unpack.core import PrettyPrintObjectMixin
-from replay_unpack.core.network.types import BinaryStream
 
-
-class EntityProperty(PrettyPrintObjectMixin):
+class EntityProperty(Record):
     """
     Fires when servers requests client to change
     entity's property with some arguments
     """
 
+    FIELDS = (("objectID", "I"), ("messageId", "I"))
+    __slots__ = ("data",)
+
     def __init__(self, stream):
-        (self.objectID,) = struct.unpack("I", stream.read(4))
-        (self.messageId,) = struct.unpack("I", stream.read(4))
+        super().__init__(stream)
         self.data = BinaryStream(stream)
@@ -1,22 +1,28 @@
 # coding=utf-8
 import logging
-import struct
 from io import BytesIO
 
 from replay_unpack.core import Entity
-from replay_unpack.core import PrettyPrintObjectMixin
 from replay_unpack.core.entity_def.bit_reader import BitReader
 from replay_unpack.core.entity_def.data_types.nested_types import (
     PyFixedDict,
     PyFixedList,
+    PyTypedArray,
 )
+from replay_unpack.core.network.types import Record
 
 
-class NestedProperty(PrettyPrintObjectMixin):
+class NestedProperty(Record):
+    FIELDS = (
+        ("entity_id", "I"),
+        ("is_slice", "b"),
+        ("payload_size", "b"),
+    )
+    __slots__ = ("u", "payload")
+
     def __init__(self, stream):
-        (self.entity_id,) = struct.unpack("I", stream.read(4))
-        self.is_slice = struct.unpack("b", stream.read(1))[0] == 1
-        (self.payload_size,) = struct.unpack("b", stream.read(1))
+        super().__init__(stream)
+        self.is_slice = self.is_slice == 1
 
         self.u = stream.read(3)  # unknown
         self.payload = stream.read()
@@ -54,7 +60,7 @@ class NestedProperty(PrettyPrintObjectMixin):
             entity.set_client_nested_property(prop_path, obj)
             logging.debug("new obj[%s] = %s", field, obj[field])
 
-        elif isinstance(obj, PyFixedList):
+        elif isinstance(obj, (PyFixedList, PyTypedArray)):
             if self.is_slice:
                 max_bits = BitReader.bits_required(len(obj) + 1)
             else:
@@ -2,6 +2,8 @@
 
 
 class PrettyPrintObjectMixin:
+    __slots__ = ()
+
     def __repr__(self):
         if getattr(self, "__slots__", None):
             props = {k: getattr(self, k) for k in self.__slots__}  # type: ignore
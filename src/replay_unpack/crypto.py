@@ -0,0 +1,58 @@
+from itertools import accumulate
+import array
+import operator
+
+from Cryptodome.Cipher import Blowfish
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, fall back to the stdlib implementation
+    np = None
+
+
+# https://github.com/landaire/wowsreplay/blob/master/docs/ReverseEngineeringNotes.md#finding-the-decryption-key
+BLOWFISH_KEY = b"\x29\xB7\xC9\x09\x38\x3F\x84\x88\xFA\x98\xEC\x4E\x13\x19\x79\xFB"
+BLOCK_SIZE = 8
+
+
+class Decryptor:
+    """
+    Incremental replay payload decryptor.
+
+    The payload is Blowfish ECB encrypted and every plaintext block is additionally
+    XORed with the previous plaintext block, which makes the chaining a prefix-XOR
+    over 64-bit words. Each chunk is decrypted and chained in bulk, carrying the
+    last plaintext block over to the next chunk.
+    """
+
+    def __init__(self):
+        self._blowfish = Blowfish.new(BLOWFISH_KEY, Blowfish.MODE_ECB)
+        self._previous_block: int = 0
+
+    def decrypt(self, encrypted: bytes) -> bytes:
+        if len(encrypted) % BLOCK_SIZE:
+            raise ValueError("Encrypted payload is not a multiple of the block size")
+        if not encrypted:
+            return b""
+
+        decrypted = self._blowfish.decrypt(encrypted)
+
+        if np is not None:
+            words = np.bitwise_xor.accumulate(np.frombuffer(decrypted, dtype=np.uint64))
+            if self._previous_block:
+                words ^= np.uint64(self._previous_block)
+            self._previous_block = int(words[-1])
+            return words.tobytes()
+
+        words = array.array("Q")
+        words.frombytes(decrypted)
+        words = array.array("Q", accumulate(words, operator.xor, initial=self._previous_block))
+        self._previous_block = words[-1]
+        return words[1:].tobytes()
+
+
+def decrypt(encrypted: bytes) -> bytes:
+    """
+    Decrypt a whole replay payload at once.
+    """
+    return Decryptor().decrypt(encrypted)
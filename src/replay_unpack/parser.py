@@ -1,20 +1,81 @@
-from typing import Any, BinaryIO, Dict, List, Optional
-import io
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import json
+import logging
+import mmap
+import os
 import struct
 import zlib
+from types import GeneratorType
 
-from Cryptodome.Cipher import Blowfish
 import packaging.version
 from pydantic import BaseModel
 
+from replay_unpack.cache import PacketStreamCache, hash_payload
 from replay_unpack.clients.wows.player import ReplayPlayer
+from replay_unpack.clients.wows.positions import Positions
+from replay_unpack.core import IBattleController, NetPacket
+from replay_unpack.core.network.checkpoint import Checkpoint, load_checkpoints, save_checkpoints
+from replay_unpack.core.network.packet_index import PacketIndex
+from replay_unpack.crypto import BLOCK_SIZE, Decryptor, decrypt
 from replay_unpack.models import ReplayData
 
 
-# https://github.com/landaire/wowsreplay/blob/master/docs/ReverseEngineeringNotes.md#finding-the-decryption-key
-BLOWFISH_KEY = b"\x29\xB7\xC9\x09\x38\x3F\x84\x88\xFA\x98\xEC\x4E\x13\x19\x79\xFB"
 FILE_SIGNATURE = b"\x12\x32\x34\x11"
+# ciphertext read per step in streaming mode, must be a multiple of the block size
+CHUNK_SIZE = 64 * 1024
+INDEX_SUFFIX = ".pktidx"
+CHECKPOINT_SUFFIX = ".ckpt"
+# seconds of battle between two checkpoints
+CHECKPOINT_INTERVAL = 60.0
+
+
+class ReplayHeader(BaseModel):
+    arena_info: Dict[Any, Any]
+    extras: List[bytes]
+    raw_size: int
+    compressed_size: int
+    payload_size: Optional[int] = None  # None if the input is not seekable
+
+    @property
+    def block_count(self) -> int:
+        return len(self.extras) + 1
+
+    @property
+    def owner_account_id(self) -> Optional[int]:
+        ids = self._get_ids()
+        return ids[0] if ids else None
+
+    @property
+    def arena_id(self) -> Optional[int]:
+        ids = self._get_ids()
+        return ids[1] if ids else None
+
+    def _get_ids(self) -> Optional[List[int]]:
+        try:
+            owner_account_id, arena_id = self.extras[1].split(b".")
+            return [int(owner_account_id), int(arena_id)]
+        except (IndexError, ValueError):
+            return None
+
+    def get_problems(self) -> List[str]:
+        """
+        Sanity checks that can be done without decrypting the payload.
+        """
+        problems = []
+
+        if self.compressed_size <= 0 or self.raw_size <= 0:
+            problems.append("declared sizes are not positive")
+        if self.compressed_size % BLOCK_SIZE:
+            problems.append("compressed size is not a multiple of the block size")
+        if self.payload_size is not None:
+            if self.payload_size < self.compressed_size:
+                problems.append("payload is truncated")
+            elif self.payload_size > self.compressed_size:
+                problems.append("payload is larger than the compressed size")
+        if self.arena_id is None:
+            problems.append("extras do not contain an arena id")
+
+        return problems
 
 
 class Replay(BaseModel):
@@ -23,55 +84,385 @@ class Replay(BaseModel):
     data: ReplayData
 
 
+class MappedFile:
+    """
+    Read-only memory-mapped file with the subset of the BinaryIO interface used by
+    ReplayParser. Reads return memoryview slices of the mapping instead of copies.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.name: str = os.fspath(path)
+
+        with open(path, "rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._position = 0
+
+    def read(self, size: int = -1) -> memoryview:
+        start = self._position
+        end = len(self._view) if size < 0 else min(start + size, len(self._view))
+        self._position = end
+        return self._view[start:end]
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        self._position = max(offset, 0)
+        return self._position
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:  # slices are still referenced, the mapping goes away with them
+            pass
+
+
+def _close_after(iterator: Iterator[Any], raw: Any) -> Iterator[Any]:
+    """
+    Pass the iterator through and close raw once it is exhausted or dropped.
+    """
+    try:
+        yield from iterator
+    finally:
+        _close_stream(raw)
+
+
+def _close_stream(raw: Any):
+    """
+    Close a packet stream: a mapping from the cache, so the cache can evict it, or
+    chunks that were not played to the end, so a cache entry written through is
+    discarded right away instead of whenever the generator is collected.
+    """
+    if isinstance(raw, mmap.mmap):
+        try:
+            raw.close()
+        except BufferError:  # slices are still referenced, the mapping goes away with them
+            pass
+    elif isinstance(raw, GeneratorType):
+        raw.close()
+
+
 class ReplayParser:
-    def __init__(self, fp: BinaryIO, strict: bool = False):
-        self.fp: BinaryIO = fp
+    def __init__(
+        self,
+        fp: Union[BinaryIO, str, os.PathLike],
+        strict: bool = False,
+        cache: Optional[PacketStreamCache] = None,
+        typed_arrays: bool = False,
+    ):
+        """
+        Replays given as a path are memory-mapped, so the header and the payload
+        are sliced out of the page cache without being copied.
+        With a cache, the decompressed packet stream is stored on disk and reused
+        the next time the same replay is parsed. This requires a seekable input.
+        With typed_arrays, arrays of fixed-size elements such as minimap vision updates
+        decode into typed columns instead of lists of dicts.
+        """
+        if isinstance(fp, (str, os.PathLike)):
+            fp = MappedFile(fp)  # type: ignore
+
+        self.fp: BinaryIO = fp  # type: ignore
         self.strict: bool = strict
+        self.cache: Optional[PacketStreamCache] = cache
+        self.typed_arrays: bool = typed_arrays
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # file objects passed in are owned by the caller
+        if isinstance(self.fp, MappedFile):
+            self.fp.close()
+
+    def scan_header(self) -> ReplayHeader:
+        """
+        Read only the replay header, without touching the encrypted payload.
+        The file is left positioned at its end.
+        """
+        header = self._read_header()
+
+        if self.fp.seekable():
+            offset = self.fp.tell()
+            header.payload_size = self.fp.seek(0, os.SEEK_END) - offset
+
+        return header
+
+    def parse(
+        self,
+        period: float,
+        streaming: bool = False,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        checkpoints: Optional[List[Checkpoint]] = None,
+        stored_checkpoints: bool = False,
+        max_packets: Optional[int] = None,
+        until: Optional[Callable[[IBattleController], bool]] = None,
+    ) -> Replay:
+        """
+        Parse the replay. In streaming mode the payload is read, decrypted and
+        decompressed chunk by chunk while it is played, which keeps peak memory
+        at a small constant instead of several copies of the whole payload.
+        Parsing stops before the first packet after end, after max_packets packets or
+        once until returns True for the battle controller after a packet. Without start
+        that always streams, so the rest of the payload is never decrypted. If parsing
+        stopped before the end of the replay, the data is partial, see
+        BattleController.get_data.
+        With start, playing resumes from the last checkpoint at or before it instead
+        of from the beginning, the result is the same as without start except that
+        max_packets counts from the checkpoint. Checkpoints are either given or, with
+        stored_checkpoints, loaded from next to the replay, see build_checkpoints.
+        Only load stored checkpoints of replays from trusted sources, they are pickles.
+        Resuming is not done in streaming mode.
+        """
+        if start is None and (end, max_packets, until) != (None, None, None):
+            streaming = True
 
-    def parse(self, period: float) -> Replay:
-        if self.fp.read(4) != FILE_SIGNATURE:
+        header = self._read_header()
+        resume = start is not None and not streaming
+        key = None
+        if resume and checkpoints is None and stored_checkpoints:
+            # the payload is only hashed to match stored checkpoints that exist
+            path = self._get_sidecar_path(CHECKPOINT_SUFFIX)
+            if path and os.path.isfile(path):
+                key = self._hash_payload()
+                checkpoints = load_checkpoints(path, key)
+        raw = self._get_raw(header, streaming, key)
+
+        arena_info = header.arena_info
+        version = packaging.version.parse(arena_info["clientVersionFromXml"].replace(",", "."))
+        player = ReplayPlayer(version, period, self.typed_arrays)
+
+        offset = 0
+        if resume and checkpoints:
+            player, offset = self._restore(player, checkpoints, start)  # type: ignore
+
+        stop = (lambda: until(player.battle_controller)) if until is not None else None
+        try:
+            player.play(
+                raw, self.strict, end=end, offset=offset, max_packets=max_packets, stop=stop
+            )
+        finally:
+            _close_stream(raw)
+        data = player.get_data(partial=player.stopped)
+
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            from pympler import asizeof
+
+            logging.debug("replay data size: %s bytes", asizeof.asizeof(data))
+
+        return Replay(arena_info=arena_info, extras=header.extras, data=data)
+
+    def build_checkpoints(
+        self, period: float, interval: float = CHECKPOINT_INTERVAL, persist: bool = False
+    ) -> List[Checkpoint]:
+        """
+        Play the replay once and take a checkpoint every interval seconds of battle,
+        for parse with start. With persist, they are stored next to the replay
+        and used for as long as the replay payload stays the same.
+        """
+        self.fp.seek(0)
+        header = self._read_header()
+        key = self._hash_payload()
+        raw = self._get_raw(header, False, key)
+
+        version = packaging.version.parse(
+            header.arena_info["clientVersionFromXml"].replace(",", ".")
+        )
+        player = ReplayPlayer(version, period, self.typed_arrays)
+        try:
+            checkpoints = player.play(raw, self.strict, checkpoint_interval=interval)
+        finally:
+            _close_stream(raw)
+
+        path = self._get_sidecar_path(CHECKPOINT_SUFFIX)
+        if persist and path:
+            save_checkpoints(path, key, checkpoints)
+
+        return checkpoints
+
+    def get_index(self, persist: bool = False) -> PacketIndex:
+        """
+        Get the packet table of contents. With persist, it is stored next to the replay
+        and reused for as long as the replay payload stays the same.
+        """
+        return self._load_index(persist, with_raw=False)[1]
+
+    def iter_packets(
+        self, types: Iterable[int], persist_index: bool = False
+    ) -> Iterator[NetPacket]:
+        """
+        Yield only the packets of the given types, jumping over all others with the
+        packet index. Deserialize them with the PACKETS_MAPPING of the replay version,
+        e.g. PACKETS_MAPPING[0x22](packet.raw_data).data for the battle results.
+        """
+        raw, index = self._load_index(persist_index, with_raw=True)
+        return _close_after(index.iter_packets(raw, types), raw)  # type: ignore
+
+    def get_positions(self, persist_index: bool = False, use_numpy: bool = True) -> Positions:
+        """
+        Extract the position updates of all entities as columns, reading only
+        the position packets and without playing the replay.
+        """
+        raw, index = self._load_index(persist_index, with_raw=True)
+        try:
+            return Positions.extract(raw, index, use_numpy)  # type: ignore
+        finally:
+            _close_stream(raw)
+
+    def _load_index(
+        self, persist: bool, with_raw: bool
+    ) -> Tuple[Optional[Union[bytes, mmap.mmap]], PacketIndex]:
+        self.fp.seek(0)
+        header = self._read_header()
+        key = self._hash_payload()
+
+        path = self._get_sidecar_path(INDEX_SUFFIX)
+        index = PacketIndex.load(path, key) if path else None
+        if index is not None and not with_raw:
+            return None, index
+
+        raw = self._get_raw(header, False, key)
+        if index is None:
+            index = PacketIndex.build(raw)  # type: ignore
+            if persist and path:
+                index.save(path, key)
+
+        return raw, index  # type: ignore
+
+    def _get_sidecar_path(self, suffix: str) -> Optional[str]:
+        """
+        Path of a file stored next to the replay, None if the replay is not a file.
+        """
+        path = getattr(self.fp, "name", None)
+        if isinstance(path, str) and os.path.isfile(path):
+            return path + suffix
+        return None
+
+    def _restore(
+        self, player: ReplayPlayer, checkpoints: List[Checkpoint], start: float
+    ) -> Tuple[ReplayPlayer, int]:
+        """
+        Player restored from the last usable checkpoint at or before start and the offset
+        to continue playing from, or the given player and 0 if there is none.
+        """
+        for checkpoint in sorted(checkpoints, key=lambda c: c.time, reverse=True):
+            if checkpoint.time > start:
+                continue
+
+            try:
+                restored = player.restore_checkpoint(checkpoint)
+            except ValueError:
+                logging.warning("Skipping checkpoint made with other definitions")
+                continue
+
+            # checkpoints are made with a given period and decoding
+            if (restored.period, restored.typed_arrays) == (player.period, self.typed_arrays):
+                return restored, checkpoint.offset  # type: ignore
+
+        return player, 0
+
+    def _read(self, size: int) -> bytes:
+        data = bytes(self.fp.read(size))
+        if len(data) != size:
+            raise ValueError("Replay header is truncated")
+        return data
+
+    def _read_header(self) -> ReplayHeader:
+        if bytes(self.fp.read(4)) != FILE_SIGNATURE:
             raise ValueError("Replay does not match expected signature")
 
-        (count,) = struct.unpack("i", self.fp.read(4))
-        (block_size,) = struct.unpack("i", self.fp.read(4))
+        count, block_size = struct.unpack("ii", self._read(8))
 
-        arena_info = json.loads(self.fp.read(block_size))
+        arena_info = json.loads(self._read(block_size))
 
-        extras = [self.fp.read(struct.unpack("i", self.fp.read(4))[0]) for _ in range(count - 1)]
+        extras = [self._read(struct.unpack("i", self._read(4))[0]) for _ in range(count - 1)]
         # 1: unknown, empty?
         # 2: owner database id & arena id encoded in utf-8 (ex. "503379282.7586554612222861")
 
-        (raw_size,) = struct.unpack("i", self.fp.read(4))
-        (compressed_size,) = struct.unpack("i", self.fp.read(4))
+        raw_size, compressed_size = struct.unpack("ii", self._read(8))
+
+        return ReplayHeader(
+            arena_info=arena_info,
+            extras=extras,
+            raw_size=raw_size,
+            compressed_size=compressed_size,
+        )
+
+    def _hash_payload(self) -> str:
+        offset = self.fp.tell()
+        key = hash_payload(iter(lambda: self.fp.read(CHUNK_SIZE), b""))
+        self.fp.seek(offset)
+        return key
+
+    def _get_raw(
+        self, header: ReplayHeader, streaming: bool, key: Optional[str] = None
+    ) -> Union[bytes, mmap.mmap, Iterator[bytes]]:
+        if self.cache is None:
+            return self._decompress(header, streaming)
 
-        blowfish = Blowfish.new(BLOWFISH_KEY, Blowfish.MODE_ECB)
-        buffer = io.BytesIO()
-        previous_block: Optional[int] = None
-        encrypted = self.fp.read()
+        if key is None:
+            key = self._hash_payload()
 
-        for index in range(0, len(encrypted), 8):
-            chunk = encrypted[index : index + 8]
+        cached = self.cache.get(key, header.raw_size)
+        if cached is not None:
+            if streaming:
+                chunks = (cached[i : i + CHUNK_SIZE] for i in range(0, len(cached), CHUNK_SIZE))
+                return _close_after(chunks, cached)
+            return cached
 
-            (decrypted_block,) = struct.unpack("q", blowfish.decrypt(chunk))
-            if previous_block:
-                decrypted_block ^= previous_block
-            previous_block = decrypted_block
+        raw = self._decompress(header, streaming)
+        if streaming:
+            return self.cache.write_through(key, raw)  # type: ignore
 
-            buffer.write(struct.pack("q", decrypted_block))
+        self.cache.put(key, raw)  # type: ignore
+        return raw
 
-        compressed = buffer.getvalue()
-        assert len(compressed) == compressed_size
+    def _decompress(self, header: ReplayHeader, streaming: bool) -> Union[bytes, Iterator[bytes]]:
+        if streaming:
+            return self._iter_raw(header.raw_size, header.compressed_size)
+
+        compressed = decrypt(self.fp.read())
+        assert len(compressed) == header.compressed_size
         raw = zlib.decompress(compressed)
-        assert len(raw) == raw_size
+        assert len(raw) == header.raw_size
+        return raw
 
-        version = packaging.version.parse(arena_info["clientVersionFromXml"].replace(",", "."))
-        player = ReplayPlayer(version, period)
-        player.play(raw, self.strict)
-        data = player.get_data()
+    def _iter_raw(self, raw_size: int, compressed_size: int) -> Iterator[bytes]:
+        """
+        Yield the decompressed packet stream in chunks of at most CHUNK_SIZE bytes.
+        """
+        decryptor = Decryptor()
+        decompressor = zlib.decompressobj()
+        compressed_read = 0
+        raw_read = 0
+
+        while encrypted := self.fp.read(CHUNK_SIZE):
+            compressed_read += len(encrypted)
+            data = decryptor.decrypt(encrypted)
 
-        # TODO: wrap this up, log
-        from pympler import asizeof
+            # the zlib stream is padded up to the block size, ignore trailing bytes
+            while data and not decompressor.eof:
+                raw = decompressor.decompress(data, CHUNK_SIZE)
+                raw_read += len(raw)
+                yield raw
+                data = decompressor.unconsumed_tail
 
-        print(asizeof.asizeof(data))
+        raw = decompressor.flush()
+        raw_read += len(raw)
+        yield raw
 
-        return Replay(arena_info=arena_info, extras=extras, data=data)
+        assert compressed_read == compressed_size
+        assert decompressor.eof
+        assert raw_read == raw_size
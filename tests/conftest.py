@@ -0,0 +1,28 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from main import default
+
+TESTS = Path(__file__).parent
+REPLAYS: List[Path] = sorted(TESTS.glob("replays/*/*.wowsreplay"))
+
+
+def replay_id(path: Path) -> str:
+    return path.relative_to(TESTS / "replays").as_posix()
+
+
+def digest(model) -> str:
+    """
+    Hash of a model in the serialization of the command line tool.
+    """
+    dumped = json.dumps(model.model_dump(warnings=False), default=default, sort_keys=True)
+    return hashlib.sha256(dumped.encode()).hexdigest()
+
+
+@pytest.fixture(params=REPLAYS, ids=replay_id)
+def replay_path(request) -> Path:
+    return request.param
@@ -0,0 +1,41 @@
+"""
+Differential tests of whole replays against the output of the baseline parser.
+
+baseline.json holds the digest of the Replay the baseline produced for every test replay,
+null for replays it rejected with a validation error.
+"""
+import json
+
+import pydantic
+import pytest
+
+from replay_unpack.parser import ReplayParser
+
+from conftest import TESTS, digest, replay_id
+
+BASELINE = json.loads((TESTS / "baseline.json").read_text())
+
+
+@pytest.mark.parametrize(
+    "mapped, streaming, typed_arrays",
+    [
+        pytest.param(False, False, False, id="file"),
+        pytest.param(True, False, False, id="mapped"),
+        pytest.param(False, True, False, id="streaming"),
+        pytest.param(True, False, True, id="typed"),
+    ],
+)
+def test_matches_baseline(replay_path, mapped, streaming, typed_arrays):
+    expected = BASELINE[replay_id(replay_path)]
+
+    with open(replay_path, "rb") as fp, ReplayParser(
+        replay_path if mapped else fp, strict=True, typed_arrays=typed_arrays
+    ) as parser:
+        if expected is None:
+            with pytest.raises(pydantic.ValidationError):
+                parser.parse(0.5, streaming)
+            return
+
+        replay = parser.parse(0.5, streaming)
+
+    assert digest(replay) == expected
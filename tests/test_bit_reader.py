@@ -0,0 +1,109 @@
+"""
+Property-based tests of BitReader against the bit-by-bit reader it replaced.
+"""
+from io import BytesIO
+from math import ceil, log
+from typing import Iterable
+
+from hypothesis import given, strategies as st
+
+from replay_unpack.core.entity_def.bit_reader import BitReader
+
+
+class ReferenceBitReader(object):
+    """
+    The original reader, one byte at a time into a list of bits.
+    """
+
+    def __init__(self, stream):
+        if isinstance(stream, bytes):
+            self._stream = BytesIO(stream)
+        else:
+            self._stream = stream
+
+        self._bits_cache = []
+        self._read_bits = 0
+
+    @staticmethod
+    def bits_required(length) -> int:
+        if length < 1:
+            return 0
+        return int(ceil(log(length, 2)))
+
+    @property
+    def bytes_read(self) -> int:
+        return int(ceil(self._read_bits / 8.0))
+
+    def get_rest(self) -> bytes:
+        return self._stream.read()
+
+    def _iter_string_bits(self, string) -> Iterable[bool]:
+        for b in string:
+            for i in reversed(range(8)):
+                yield (b >> i) & 1  # 0b00..[0|1]
+
+    def _get_next_byte(self) -> bytes:
+        next_byte = self._stream.read(1)
+        if next_byte == "":
+            raise Exception("I am empty %s" % self._read_bits)
+        return next_byte
+
+    def _get_next_bit(self):
+        if not self._bits_cache:
+            next_byte = self._get_next_byte()
+            self._bits_cache = list(self._iter_string_bits(next_byte))
+
+        self._read_bits += 1
+        try:
+            return self._bits_cache.pop(0)
+        except IndexError:
+            raise Exception("I am empty %s" % self._read_bits)
+
+    def get(self, nbits) -> int:
+        if nbits == 0:
+            return 0
+
+        value = 0
+        while nbits > 0:
+            bit = self._get_next_bit()
+            value = (value << 1) | bit  # add bit to number
+            nbits -= 1
+        return value
+
+
+def read(reader, reads):
+    """
+    Values read until the first failure, the failure and what is left.
+    """
+    values = []
+    for nbits in reads:
+        try:
+            values.append(reader.get(nbits))
+        except Exception as e:
+            return values, str(e), None
+    return values, None, (reader.bytes_read, reader.get_rest())
+
+
+@given(
+    data=st.binary(max_size=64),
+    reads=st.lists(st.integers(min_value=0, max_value=70), max_size=20),
+    as_stream=st.booleans(),
+)
+def test_reads_match_reference(data, reads, as_stream):
+    def source():
+        return BytesIO(data) if as_stream else data
+
+    assert read(BitReader(source()), reads) == read(ReferenceBitReader(source()), reads)
+
+
+@given(st.integers(min_value=0, max_value=1 << 24))
+def test_bits_required_matches_reference(length):
+    assert BitReader.bits_required(length) == ReferenceBitReader.bits_required(length)
+
+
+@given(data=st.binary(min_size=1, max_size=16), nbits=st.integers(min_value=1, max_value=7))
+def test_rest_drops_partially_read_byte(data, nbits):
+    reader = BitReader(data)
+    reader.get(nbits)
+    assert reader.bytes_read == 1
+    assert reader.get_rest() == data[1:]
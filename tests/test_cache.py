@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from replay_unpack.cache import PacketStreamCache
+from replay_unpack.parser import ReplayParser
+
+from conftest import TESTS, digest
+
+SMOKE = TESTS / "replays" / "12_7_0" / "smoke.wowsreplay"
+
+
+def parse(cache: PacketStreamCache, streaming: bool, **kwargs):
+    with ReplayParser(SMOKE, cache=cache) as parser:
+        return parser.parse(0.5, streaming, **kwargs)
+
+
+def list_cache(cache: PacketStreamCache):
+    return sorted(os.listdir(cache.directory))
+
+
+@pytest.mark.parametrize("streaming", [False, True], ids=["file", "streaming"])
+def test_hit_matches_miss(tmp_path, streaming):
+    cache = PacketStreamCache(tmp_path)
+    expected = digest(parse(None, False))
+
+    # the miss stores the stream, whichever way it was decompressed
+    assert digest(parse(cache, streaming)) == expected
+    (entry,) = list_cache(cache)
+    assert entry.endswith(PacketStreamCache.SUFFIX)
+
+    for hit_streaming in (False, True):
+        assert digest(parse(cache, hit_streaming)) == expected
+    assert list_cache(cache) == [entry]
+
+
+def test_size_mismatch_is_miss(tmp_path):
+    cache = PacketStreamCache(tmp_path)
+    cache.put("key", b"packets")
+    assert cache.get("key", 6) is None
+
+    mapped = cache.get("key", 7)
+    assert mapped[:] == b"packets"
+    mapped.close()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = PacketStreamCache(tmp_path, max_size=250)
+    for age, key in enumerate(["a", "b"]):
+        cache.put(key, bytes(100))
+        os.utime(tmp_path / (key + PacketStreamCache.SUFFIX), (1000 + age, 1000 + age))
+
+    # reading a marks it as recently used, so b is the oldest once c is added
+    cache.get("a", 100).close()
+    cache.put("c", bytes(100))
+    assert list_cache(cache) == ["a.packets", "c.packets"]
+
+    cache.max_size = 0
+    cache.evict()
+    assert list_cache(cache) == []
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"max_packets": 10}, {"end": 5.0}, {"until": lambda controller: True}],
+    ids=["max_packets", "end", "until"],
+)
+def test_early_stop_discards_entry(tmp_path, kwargs):
+    cache = PacketStreamCache(tmp_path)
+
+    # stopping early streams through the cache without consuming the whole stream
+    parse(cache, False, **kwargs)
+    assert list_cache(cache) == []
+
+    expected = digest(parse(None, False))
+    assert digest(parse(cache, False)) == expected
+    assert len(list_cache(cache)) == 1
@@ -0,0 +1,74 @@
+"""
+Parsing resumed from a checkpoint against parsing from the beginning.
+"""
+import shutil
+
+import pytest
+
+from replay_unpack.parser import ReplayParser
+
+from conftest import TESTS, digest
+
+REPLAY = TESTS / "replays" / "12_7_0" / "test.wowsreplay"
+START = 250.0
+
+
+@pytest.fixture(scope="module")
+def checkpoints():
+    with ReplayParser(REPLAY) as parser:
+        checkpoints = parser.build_checkpoints(0.5)
+    assert any(0 < checkpoint.time <= START for checkpoint in checkpoints)
+    return checkpoints
+
+
+@pytest.fixture
+def restored(monkeypatch):
+    """
+    Offsets playing resumed from, 0 when no checkpoint was used.
+    """
+    offsets = []
+    restore = ReplayParser._restore
+
+    def spy(self, *args):
+        player, offset = restore(self, *args)
+        offsets.append(offset)
+        return player, offset
+
+    monkeypatch.setattr(ReplayParser, "_restore", spy)
+    return offsets
+
+
+def parse(path=REPLAY, **kwargs):
+    with ReplayParser(path) as parser:
+        return parser.parse(0.5, **kwargs)
+
+
+@pytest.mark.parametrize("end", [None, 300.0], ids=["full", "end"])
+def test_resumed_matches_full(checkpoints, restored, end):
+    expected = digest(parse(end=end).data)
+    assert digest(parse(start=START, end=end, checkpoints=checkpoints).data) == expected
+    assert restored and restored[0] > 0
+
+
+def test_stored_checkpoints(tmp_path, restored):
+    path = tmp_path / REPLAY.name
+    shutil.copy(REPLAY, path)
+    with ReplayParser(path) as parser:
+        parser.build_checkpoints(0.5, persist=True)
+
+    expected = digest(parse(end=300.0).data)
+    assert digest(parse(path, start=START, end=300.0, stored_checkpoints=True).data) == expected
+    assert restored and restored[0] > 0
+
+
+def test_no_checkpoints_skips_hashing(tmp_path, monkeypatch):
+    path = tmp_path / REPLAY.name
+    shutil.copy(REPLAY, path)
+    expected = digest(parse(path, end=300.0).data)
+
+    def hash_payload(self):
+        raise AssertionError("payload hashed")
+
+    monkeypatch.setattr(ReplayParser, "_hash_payload", hash_payload)
+    for kwargs in ({}, {"checkpoints": []}, {"stored_checkpoints": True}):
+        assert digest(parse(path, start=START, end=300.0, **kwargs).data) == expected
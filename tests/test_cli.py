@@ -0,0 +1,33 @@
+import json
+import subprocess
+import sys
+
+from main import get_arg_parser
+
+from conftest import REPLAYS, TESTS
+
+
+def test_scan_output(tmp_path):
+    output = tmp_path / "out.jsonl"
+    args = get_arg_parser().parse_args(["scan", "a.wowsreplay", "b", "-o", str(output)])
+    args.output.close()
+    assert args.replays == ["a.wowsreplay", "b"]
+    assert args.output.name == str(output)
+
+
+def test_scan_output_default():
+    args = get_arg_parser().parse_args(["scan", "a.wowsreplay"])
+    assert args.replays == ["a.wowsreplay"]
+    assert args.output is sys.stdout
+
+
+def test_scan(tmp_path):
+    output = tmp_path / "out.jsonl"
+    completed = subprocess.run(
+        [sys.executable, TESTS.parent / "src" / "main.py", "scan", REPLAYS[0], "-o", output],
+        capture_output=True,
+        check=True,
+    )
+    assert completed.stdout == b""
+    (line,) = output.read_text().splitlines()
+    assert json.loads(line)["path"] == str(REPLAYS[0])
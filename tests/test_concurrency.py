@@ -0,0 +1,30 @@
+"""
+Several replays parsed in one process, one after another and at the same time,
+have to give what each gives on its own.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from replay_unpack.parser import ReplayParser
+
+from conftest import REPLAYS, digest
+
+
+def parse(path) -> str:
+    """
+    Digest of the replay or the error it fails with.
+    """
+    try:
+        with ReplayParser(path, strict=True) as parser:
+            return digest(parser.parse(0.5))
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def test_sequential_and_concurrent_match():
+    sequential = [parse(path) for path in REPLAYS]
+
+    # controllers of earlier replays must not receive callbacks of later ones
+    assert [parse(path) for path in REPLAYS] == sequential
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(parse, REPLAYS)) == sequential
@@ -0,0 +1,144 @@
+"""
+Differential tests of the compiled decoders of data types against the interpreted
+ones they were generated from, which are still used for streams other than BytesIO.
+"""
+import math
+import random
+from io import BytesIO
+from typing import Iterator
+
+import pytest
+
+from replay_unpack.clients.wows.helper import get_definitions
+from replay_unpack.core.entity_def.data_types.base import DataType
+from replay_unpack.core.entity_def.data_types.nested_types import PyTypedArray
+from replay_unpack.parser import ReplayParser
+
+from conftest import TESTS
+
+VERSIONS = ["12_6_0", "12_7_0"]
+
+
+class InterpretedStream:
+    """
+    Stream that is not a BytesIO, so decoding stays interpreted all the way down.
+    """
+
+    def __init__(self, stream: BytesIO):
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def seek(self, *args) -> int:
+        return self._stream.seek(*args)
+
+
+def same(a, b) -> bool:
+    if isinstance(a, PyTypedArray) or isinstance(b, PyTypedArray):
+        return type(a) is type(b) and same(list(a), list(b))
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, float):
+        return a == b or (math.isnan(a) and math.isnan(b))
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def decode(create, stream: BytesIO):
+    """
+    Value or exception type of decoding and the stream position after it.
+    """
+    try:
+        value = create(stream)
+    except Exception as e:  # malformed payloads have to fail in both
+        value = type(e)
+    return value, stream.tell()
+
+
+def check(create, data: bytes, start: int = 0):
+    compiled_stream = BytesIO(data)
+    compiled_stream.seek(start)
+    compiled, compiled_end = decode(create, compiled_stream)
+
+    interpreted_stream = BytesIO(data)
+    interpreted_stream.seek(start)
+    interpreted, interpreted_end = decode(create, InterpretedStream(interpreted_stream))
+
+    assert isinstance(compiled, type) == isinstance(interpreted, type)
+    if not isinstance(compiled, type):
+        assert same(compiled, interpreted)
+        assert compiled_end == interpreted_end
+
+
+def iter_entity_defs(definitions) -> Iterator:
+    index = 1
+    while True:
+        try:
+            yield definitions.get_entity_def_by_index(index)
+        except KeyError:
+            return
+        index += 1
+
+
+def iter_targets(version: str, typed_arrays: bool):
+    definitions = get_definitions(version, typed_arrays)
+    for spec in iter_entity_defs(definitions):
+        for prop in spec.properties().get_properties_by_flags(~0):
+            yield f"{spec.get_name()}.{prop.get_name()}", prop.create_from_stream
+        for methods in (spec.client(), spec.cell(), spec.base()):
+            for method in methods.get_exposed_index_map():
+                yield f"{spec.get_name()}.{method.get_name()}", method.create_from_stream
+
+
+def random_payload(rng: random.Random) -> bytes:
+    # mostly small bytes, so that sizes and counts stay within the payload
+    size = rng.choice([0, 1, 2, 4, 8, 16, 64, 300])
+    return bytes(
+        rng.randrange(4) if rng.random() < 0.5 else rng.randrange(256) for _ in range(size)
+    )
+
+
+@pytest.mark.parametrize("typed_arrays", [False, True], ids=["lists", "typed"])
+@pytest.mark.parametrize("version", VERSIONS)
+def test_random_payloads(version, typed_arrays):
+    rng = random.Random(f"{version}-{typed_arrays}")
+    for name, create in iter_targets(version, typed_arrays):
+        for _ in range(20):
+            data = random_payload(rng)
+            try:
+                check(create, data)
+            except AssertionError as e:
+                raise AssertionError(f"{name} differs on {data.hex()}") from e
+
+
+@pytest.mark.parametrize("typed_arrays", [False, True], ids=["lists", "typed"])
+@pytest.mark.parametrize("name", ["12_6_0/jager", "12_7_0/test"])
+def test_replay_payloads(monkeypatch, name, typed_arrays):
+    """
+    Cross-check every value decoded while parsing a replay.
+    """
+    create_from_stream = DataType.create_from_stream
+    calls = []
+
+    def checked(self, stream, header_size=1):
+        if isinstance(stream, BytesIO):
+            calls.append(self)
+            check(
+                lambda s: create_from_stream(self, s, header_size), stream.getvalue(), stream.tell()
+            )
+        return create_from_stream(self, stream, header_size)
+
+    monkeypatch.setattr(DataType, "create_from_stream", checked)
+    with ReplayParser(
+        TESTS / "replays" / f"{name}.wowsreplay", typed_arrays=typed_arrays
+    ) as parser:
+        parser.parse(0.5)
+
+    assert calls
@@ -0,0 +1,64 @@
+"""
+Parsing stopped before the end of the replay, which gives partial data.
+"""
+import os
+
+import pydantic
+import pytest
+
+from replay_unpack.cache import PacketStreamCache
+from replay_unpack.models import ReplayData
+from replay_unpack.parser import ReplayParser
+
+from conftest import TESTS
+
+REPLAY = TESTS / "replays" / "12_7_0" / "smoke.wowsreplay"
+
+
+@pytest.fixture(scope="module")
+def full() -> ReplayData:
+    with ReplayParser(REPLAY) as parser:
+        return parser.parse(0.5).data
+
+
+def parse(tmp_path, **kwargs) -> ReplayData:
+    cache = PacketStreamCache(tmp_path)
+    with ReplayParser(REPLAY, strict=True, cache=cache) as parser:
+        data = parser.parse(0.5, **kwargs).data
+
+    # the stream was cut off, so it is neither cached nor left in a temp file
+    assert os.listdir(tmp_path) == []
+
+    # what is not known yet is left None, which does not validate
+    assert data.game_mode is None
+    with pytest.raises(pydantic.ValidationError):
+        ReplayData.model_validate(data.model_dump(by_alias=True, warnings=False))
+    return data
+
+
+def test_max_packets(tmp_path):
+    data = parse(tmp_path, max_packets=0)
+    assert data.battle_logic is None
+    assert data.players == {}
+    assert data.snapshots == []
+
+
+def test_end(tmp_path, full):
+    data = parse(tmp_path, end=5.0)
+    assert data.snapshots
+    assert len(data.snapshots) < len(full.snapshots)
+    assert data.snapshots[-1].current_time <= 5.0
+
+
+def test_until(tmp_path, full):
+    results = []
+
+    def until(controller):
+        results.append(bool(controller.players))
+        return results[-1]
+
+    data = parse(tmp_path, until=until)
+    assert list(data.players) == list(full.players)
+    assert len(data.snapshots) < len(full.snapshots)
+    # stopped right after the first packet the predicate held for
+    assert results.index(True) == len(results) - 1
@@ -0,0 +1,72 @@
+"""
+Positions extracted from the position packets against the positions the entities
+get when the replay is played.
+"""
+import struct
+from typing import List
+
+import pytest
+
+from replay_unpack import parser as parser_module
+from replay_unpack.clients.wows import positions
+from replay_unpack.clients.wows.player import ReplayPlayer
+from replay_unpack.parser import ReplayParser
+
+from conftest import TESTS
+
+
+def to_float32(value: float) -> float:
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+class RecordingPlayer(ReplayPlayer):
+    """
+    Player that records the position of an entity whenever a packet updates it.
+    """
+
+    # rows of the test playing the replay
+    rows: List[tuple] = []
+
+    def _record(self, entity_id: int):
+        entity = self._battle_controller.entities[entity_id]
+        self.rows.append(
+            (
+                to_float32(self._battle_controller.current_time),
+                entity_id,
+                *map(to_float32, entity.position),
+                to_float32(entity.yaw),
+            )
+        )
+
+    def _on_position(self, packet):
+        super()._on_position(packet)
+        self._record(packet.entityId)
+
+    def _on_player_position(self, packet):
+        entities = self._battle_controller.entities
+        applied = packet.entityId1 in entities and packet.entityId2 in (0, *entities)
+        super()._on_player_position(packet)
+        if applied:
+            self._record(packet.entityId1)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True], ids=["array", "numpy"])
+@pytest.mark.parametrize("name", ["12_7_0/smoke", "12_6_0/jager"])
+def test_matches_player(monkeypatch, name, use_numpy):
+    if use_numpy and positions.np is None:
+        pytest.skip("numpy is not installed")
+
+    rows = []
+    monkeypatch.setattr(RecordingPlayer, "rows", rows)
+    monkeypatch.setattr(parser_module, "ReplayPlayer", RecordingPlayer)
+    path = TESTS / "replays" / f"{name}.wowsreplay"
+    with ReplayParser(path) as parser:
+        parser.parse(0.5)
+    with ReplayParser(path) as parser:
+        extracted = parser.get_positions(use_numpy=use_numpy)
+
+    columns = [extracted.time, extracted.entity_id, extracted.x, extracted.y, extracted.z]
+    assert rows == [
+        (float(time), int(entity_id), float(x), float(y), float(z), float(yaw))
+        for time, entity_id, x, y, z, yaw in zip(*columns, extracted.yaw)
+    ]